@@ -0,0 +1,324 @@
+"""Benchmarks for the conversion, bulk, persistence and UI refresh paths.
+
+Runs headless: the widget paths drive VirtualTextView against a stub Text
+widget, so no display is needed. Results are written as JSON so runs can
+be compared over time:
+
+    python benchmarks.py -o before.json
+    python benchmarks.py -o after.json --compare before.json
+
+Sizes default to a quick run; pass --full for 10M bulk lines and 1M
+history entries.
+"""
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+QUICK_BULK_SIZES = (1_000, 100_000, 1_000_000)
+FULL_BULK_SIZES = (1_000, 100_000, 1_000_000, 10_000_000)
+QUICK_HISTORY_SIZES = (100, 10_000, 100_000)
+FULL_HISTORY_SIZES = (100, 10_000, 1_000_000)
+
+
+class FakeText:
+    """Just enough of a Tk Text widget for VirtualTextView"""
+
+    def __init__(self, height=20, line_height=16):
+        self.options = {'font': 'TkFixedFont', 'height': height, 'state': 'normal'}
+        self.pixel_height = height * line_height
+        self.chars = 0
+        self.calls = 0
+
+    def cget(self, key):
+        return self.options[key]
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def bind(self, *args):
+        pass
+
+    def winfo_height(self):
+        return self.pixel_height
+
+    def insert(self, index, text):
+        self.calls += 1
+        self.chars += len(text)
+
+    def delete(self, start, end=None):
+        self.calls += 1
+
+
+class FakeScrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+class FakeFont:
+    def __init__(self, font=None):
+        pass
+
+    def metrics(self, name):
+        return 16
+
+
+def stub_display():
+    """Make VirtualTextView measure fonts without a Tk root"""
+    import virtual_text
+
+    virtual_text.tkfont = type("tkfont", (), {"Font": FakeFont})
+
+
+def bulk_lines(count, seed=1):
+    rng = random.Random(seed)
+    return [f"{rng.uniform(1, 5000):.1f}" for _ in range(count)]
+
+
+def basket_lines(count, seed=2):
+    rng = random.Random(seed)
+    units = ("g", "kg", "lb", "oz")
+    return [f"{rng.uniform(20, 500):.2f},{rng.uniform(1, 5000):.1f},{rng.choice(units)}" for _ in range(count)]
+
+
+def history_records(count, seed=3):
+    from data_manager import make_history_record
+
+    rng = random.Random(seed)
+    return [
+        make_history_record("weight_to_price", rng.uniform(1, 5000), "g", "kg", 100.0, rng.uniform(0, 500), i)
+        for i in range(count)
+    ]
+
+
+class Runner:
+    def __init__(self, repeat=3):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, name, size, fn, setup=None, repeat=None):
+        """Time fn(state) `repeat` times; setup() builds a fresh state per run"""
+        times = []
+        for _ in range(repeat or self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            fn(state)
+            times.append(time.perf_counter() - start)
+        best = min(times)
+        result = {
+            "name": name,
+            "size": size,
+            "best": best,
+            "median": statistics.median(times),
+            "per_item_us": best / size * 1e6 if size else None,
+            "runs": len(times)
+        }
+        self.results.append(result)
+        print(f"{name:<32} {size:>10,}  best {best * 1000:10.2f} ms  median {result['median'] * 1000:10.2f} ms",
+              flush=True)
+        return result
+
+
+def bench_conversion(runner):
+    from pricing_engine import PricingEngine
+    from units import DEFAULT_REGISTRY
+
+    engine = PricingEngine(100, "kg")
+    count = 100_000
+
+    def convert_loop(_):
+        for i in range(count):
+            engine.convert_between_units(i, "g", "lb")
+
+    def price_loop(_):
+        for i in range(count):
+            engine.calculate_price(i, "g")
+
+    runner.run("convert_between_units", count, convert_loop)
+    runner.run("calculate_price", count, price_loop)
+    values = list(range(1_000_000))
+    runner.run("convert_batch", len(values), lambda _: DEFAULT_REGISTRY.convert_batch(values, "g", "lb"))
+
+
+def bench_bulk(runner, sizes, workers):
+    from bulk import BulkResults, calculate_bulk_lines, calculate_bulk_parallel, export_bulk
+    from pricing_engine import PricingEngine
+
+    engine = PricingEngine(100, "kg")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            lines = bulk_lines(size)
+            repeat = 1 if size >= 1_000_000 else None
+            runner.run("bulk plain", size,
+                       lambda _, lines=lines: calculate_bulk_lines(lines, engine, "weight_to_price", "g"),
+                       repeat=repeat)
+            if workers > 1:
+                # min_lines=0: below PARALLEL_MIN_LINES it would silently run in-process
+                runner.run(f"bulk plain x{workers} workers", size,
+                           lambda _, lines=lines: calculate_bulk_parallel(lines, engine, "weight_to_price", "g",
+                                                                          workers=workers, min_lines=0),
+                           repeat=repeat)
+            basket = basket_lines(min(size, 1_000_000))
+            runner.run("bulk basket", len(basket),
+                       lambda _, basket=basket: calculate_bulk_lines(basket, engine, "weight_to_price", "g"),
+                       repeat=repeat)
+            results = calculate_bulk_lines(lines, engine, "weight_to_price", "g")
+            del lines, basket
+            for extension in (".csv", ".lmb"):
+                path = os.path.join(tmp, f"bulk{extension}")
+                runner.run(f"export {extension}", size, lambda _: export_bulk(path, results), repeat=repeat)
+            runner.run("format visible window", size, lambda _: results.rows(size // 2, size // 2 + 40))
+            batches = [results] * 10
+            runner.run("extend 10 batches", size * 10, lambda combined: [combined.extend(b) for b in batches],
+                       setup=BulkResults, repeat=1)
+
+
+def bench_persistence(runner, sizes):
+    from data_manager import DataManager, HistoryLog, SqliteHistoryStore, history_columns, history_totals
+
+    for size in sizes:
+        records = history_records(size)
+        runner.run("history totals", size, lambda _: history_totals(history_columns(records)))
+        with tempfile.TemporaryDirectory() as tmp:
+            # One directory per backend, so opening the SQLite store never
+            # imports the JSON Lines fixture: load_data measures a steady-state open
+            def manager_for(backend):
+                directory = os.path.join(tmp, backend)
+                return DataManager(os.path.join(directory, "data.json"), os.path.join(directory, "history.jsonl"),
+                                   os.path.join(directory, "history.db"), backend)
+
+            for backend in ("jsonl", "sqlite"):
+                os.mkdir(os.path.join(tmp, backend))
+            log = HistoryLog(manager_for("jsonl").history_file, fsync=False)
+            log.extend(records)
+            log.close()
+            store = SqliteHistoryStore(manager_for("sqlite").history_db)
+            store.extend(records)
+            store.close()
+            for backend in ("jsonl", "sqlite"):
+                def load(_):
+                    manager_for(backend).load_data()["history"].close()
+
+                runner.run(f"load_data {backend}", size, load)
+
+            manager = manager_for("jsonl")
+            data = manager.load_data()
+            prices = iter(range(10 ** 9))
+            runner.run("save_settings (changed)", 100,
+                       lambda _: [manager.save_settings(str(next(prices)), "g", "kg") for _ in range(100)])
+            runner.run("save_settings (unchanged)", 100,
+                       lambda _: [manager.save_settings("1", "g", "kg") for _ in range(100)])
+            history = data["history"]
+            record = records[-1]
+            runner.run("history append (jsonl)", 100, lambda _: [history.append(record) for _ in range(100)])
+            history.close()
+
+
+def bench_ui(runner, history_sizes, bulk_sizes):
+    from bulk import calculate_bulk_lines
+    from data_manager import HistoryLog, format_history_entry
+    from pricing_engine import PricingEngine
+    from virtual_text import VirtualTextView
+
+    stub_display()
+    for size in history_sizes:
+        records = history_records(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            history = HistoryLog(os.path.join(tmp, "history.jsonl"), fsync=False)
+            history.extend(records)
+            view = VirtualTextView(
+                FakeText(), FakeScrollbar(), lambda: len(history),
+                lambda offset, limit: [format_history_entry(e).rstrip('\n') for e in history.page(offset, limit)]
+            )
+            runner.run("history refresh", size, lambda _: view.refresh())
+
+            def update_history(_):
+                # add_history_record + update_history, as the app does per calculation
+                for _ in range(100):
+                    history.append(records[-1])
+                    view.rows_appended()
+
+            runner.run("update_history x100", size, update_history)
+            runner.run("history scroll x100", size, lambda _: [view.scroll_to(i * 97 % size) for i in range(100)])
+            history.close()
+
+    engine = PricingEngine(100, "kg")
+    for size in bulk_sizes:
+        results = calculate_bulk_lines(bulk_lines(size), engine, "weight_to_price", "g")
+        text = FakeText()
+        view = VirtualTextView(
+            text, FakeScrollbar(), lambda: len(results),
+            lambda offset, limit: [f"{row['input']} → {row['result']}" for row in results.rows(offset, offset + limit)]
+        )
+        runner.run("bulk result render", size, lambda _: view.scroll_to_end())
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r["name"], r["size"]): r["best"] for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path} (ratio > 1 is slower):")
+    for result in results:
+        before = baseline.get((result["name"], result["size"]))
+        if before:
+            print(f"{result['name']:<32} {result['size']:>10,}  {result['best'] / before:6.2f}x")
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the Light Measure benchmarks")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--full", action="store_true", help="Include 10M bulk lines and 1M history entries")
+    parser.add_argument("--only", nargs="+", choices=["conversion", "bulk", "persistence", "ui"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    bulk_sizes = FULL_BULK_SIZES if args.full else QUICK_BULK_SIZES
+    history_sizes = FULL_HISTORY_SIZES if args.full else QUICK_HISTORY_SIZES
+    groups = args.only or ["conversion", "bulk", "persistence", "ui"]
+    runner = Runner(args.repeat)
+    if "conversion" in groups:
+        bench_conversion(runner)
+    if "bulk" in groups:
+        bench_bulk(runner, bulk_sizes, args.workers)
+    if "persistence" in groups:
+        bench_persistence(runner, history_sizes)
+    if "ui" in groups:
+        bench_ui(runner, history_sizes, bulk_sizes)
+
+    report = {
+        "timestamp": time.time(),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": runner.results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(runner.results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
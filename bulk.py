@@ -0,0 +1,565 @@
+import os
+import sys
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+
+from pricing_engine import PricingEngine, validate_number
+from units import DEFAULT_REGISTRY
+
+BULK_FIELDNAMES = ['input', 'result']
+DEFAULT_CHUNK_SIZE = 100_000
+# Below this many lines a process pool costs more than it saves
+PARALLEL_MIN_LINES = 200_000
+
+
+def calculate_bulk_values(engine: PricingEngine, mode: str, values, unit: str):
+    """Run one vectorized bulk pass for the given mode"""
+    if mode == "weight_to_price":
+        return engine.calculate_price_batch(values, unit)
+    return engine.calculate_weight_batch(values, unit)
+
+
+def write_bulk_csv(csvfile: TextIO, rows: Iterable[Dict[str, str]], header: bool = True):
+    """Write formatted bulk rows (or a BulkResults) as CSV"""
+    import csv
+
+    writer = csv.DictWriter(csvfile, fieldnames=BULK_FIELDNAMES)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+
+
+def parse_values(lines: Iterable[str], first_line: int = 1) -> List[float]:
+    """Parse one number per line, skipping blank lines"""
+    values = []
+    for line_no, line in enumerate(lines, start=first_line):
+        value = line.strip()
+        if not value:
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            number = -1.0
+        if not number >= 0:
+            raise ValueError(f"Invalid value found on line {line_no}: {value}")
+        values.append(number)
+    return values
+
+
+def split_bulk_line(line: str) -> List[str]:
+    """Split a bulk line into columns: comma, tab or whitespace separated"""
+    if ',' in line:
+        return [part.strip() for part in line.split(',')]
+    if '\t' in line:
+        return [part.strip() for part in line.split('\t')]
+    return line.split()
+
+
+def is_structured(lines: Iterable[str]) -> bool:
+    """True if any line has more than one column"""
+    return any(',' in line or len(line.split()) > 1 for line in lines)
+
+
+def parse_basket(lines: Iterable[str], engine: PricingEngine, unit: str, catalog=None, first_line: int = 1):
+    """Parse `SKU or price, quantity[, unit]` rows.
+
+    The first column is looked up as a catalog SKU, otherwise read as a
+    price per `engine.base_unit`. A bare number is a quantity at the
+    engine's price. Rows without a unit use `unit`. A header row on the
+    first line and lines starting with # are skipped. Returns parallel
+    lists (labels, quantities, units, prices, base units); labels are None
+    for bare-number rows.
+    """
+    labels, quantities, row_units, prices, base_units = [], [], [], [], []
+    for line_no, line in enumerate(lines, start=first_line):
+        columns = split_bulk_line(line)
+        if not columns or columns[0].startswith('#'):
+            continue
+        if len(columns) == 1:
+            label, price, base_unit, quantity, row_unit = None, engine.price_per_base, engine.base_unit, columns[0], unit
+        else:
+            key, quantity = columns[0], columns[1]
+            row_unit = columns[2] if len(columns) > 2 and columns[2] else unit
+            product = catalog.get(key) if catalog is not None else None
+            if product is not None:
+                label, price, base_unit = product.sku, product.price, product.base_unit
+            elif validate_number(key.lstrip('₹')):
+                price = float(key.lstrip('₹'))
+                label, base_unit = f"@₹{price:g}/{engine.base_unit}", engine.base_unit
+            elif line_no == 1 and not validate_number(quantity):
+                continue  # header row
+            else:
+                raise ValueError(f"Unknown SKU or price on line {line_no}: {key}")
+        if not validate_number(quantity):
+            raise ValueError(f"Invalid quantity on line {line_no}: {quantity}")
+        if row_unit not in engine.units:
+            raise ValueError(f"Unknown unit on line {line_no}: {row_unit}")
+        labels.append(label)
+        quantities.append(float(quantity))
+        row_units.append(row_unit)
+        prices.append(price)
+        base_units.append(base_unit)
+    return labels, quantities, row_units, prices, base_units
+
+
+def price_basket(mode: str, quantities, row_units, prices, base_units, units=DEFAULT_REGISTRY):
+    """Price (or weigh) every row of a mixed basket in one vectorized pass"""
+    import numpy as np
+
+    quantities = np.asarray(quantities, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    factors = units.matrix_array[units.unit_ids(row_units, len(quantities)), units.unit_ids(base_units, len(quantities))]
+    if np.isnan(factors).any():
+        row = int(np.flatnonzero(np.isnan(factors))[0])
+        raise ValueError(f"Cannot convert {row_units[row]} to {base_units[row]}")
+    if mode == "weight_to_price":
+        return quantities * factors * prices
+    if (prices == 0).any():
+        raise ValueError("Base price must be non-zero")
+    return quantities / (prices * factors)
+
+
+def format_basket_rows(mode: str, labels, quantities, row_units, results) -> List[Dict[str, str]]:
+    """Format basket rows; bare-number rows look exactly like plain bulk rows"""
+    if hasattr(results, 'tolist'):
+        results = results.tolist()
+    rows = []
+    for label, quantity, unit, result in zip(labels, quantities, row_units, results):
+        if mode == "weight_to_price":
+            row = {'input': f"{quantity}{unit}", 'result': f"₹{result:.2f}"}
+        else:
+            row = {'input': f"₹{quantity}", 'result': f"{result:.2f}{unit}"}
+        if label is not None:
+            row['input'] = f"{label} {row['input']}"
+        rows.append(row)
+    return rows
+
+
+class BulkResults:
+    """Bulk results kept as typed columns, formatted only for display and export.
+
+    Each row is an input value, the id of its unit, the result and a label
+    id into `labels` (-1 for plain rows), about 22 bytes per row. Batches
+    are appended as NumPy chunks without copying earlier rows; rows(),
+    iteration and write_bulk_csv() format just the rows they are asked for.
+    """
+
+    # Rows formatted per step when iterating
+    FORMAT_CHUNK = 10_000
+
+    def __init__(self, mode: str = "weight_to_price", unit_codes: List[str] = None):
+        self.mode = mode
+        self.unit_codes: List[str] = list(DEFAULT_REGISTRY.codes if unit_codes is None else unit_codes)
+        self.labels: List[str] = []
+        self._label_ids: Dict[str, int] = {}
+        self._chunks = []  # (inputs, unit_ids, results, label_ids)
+        self._offsets: List[int] = []
+        self._length = 0
+
+    @classmethod
+    def from_columns(cls, mode: str, inputs, unit_ids, results, labels=None, units=DEFAULT_REGISTRY) -> "BulkResults":
+        """Build from per-row columns; `labels` holds a string or None per row"""
+        import numpy as np
+
+        bulk = cls(mode, units.codes)
+        count = len(results)
+        if labels is None or all(label is None for label in labels):
+            label_ids = np.full(count, -1, dtype=np.int32)
+        else:
+            label_ids = np.fromiter((bulk._label_id(label) for label in labels), dtype=np.int32, count=count)
+        bulk._append_chunk(
+            np.asarray(inputs, dtype=np.float64),
+            np.broadcast_to(np.asarray(unit_ids, dtype=np.int16), (count,)).copy(),
+            np.asarray(results, dtype=np.float64),
+            label_ids
+        )
+        return bulk
+
+    def _label_id(self, label) -> int:
+        if label is None:
+            return -1
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        return label_id
+
+    def _append_chunk(self, *columns):
+        if not len(columns[0]):
+            return
+        self._chunks.append(columns)
+        self._offsets.append(self._length)
+        self._length += len(columns[0])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def extend(self, other: "BulkResults"):
+        """Append another batch's rows, remapping its unit and label ids"""
+        import numpy as np
+
+        if not self._length:
+            self.mode = other.mode
+        elif other.mode != self.mode:
+            raise ValueError("Cannot mix bulk results of different modes")
+        unit_table = np.array([self._unit_id(code) for code in other.unit_codes], dtype=np.int16)
+        label_table = np.array([self._label_id(label) for label in other.labels] + [-1], dtype=np.int32)
+        for inputs, unit_ids, results, label_ids in other._chunks:
+            # Label -1 indexes the trailing -1 of the table
+            self._append_chunk(inputs, unit_table[unit_ids], results, label_table[label_ids])
+
+    def _unit_id(self, code: str) -> int:
+        if code not in self.unit_codes:
+            self.unit_codes.append(code)
+        return self.unit_codes.index(code)
+
+    def _pieces(self, start: int, stop: int):
+        """(chunk, lo, hi) for each chunk overlapping rows start..stop"""
+        index = max(bisect_right(self._offsets, start) - 1, 0)
+        while index < len(self._chunks) and self._offsets[index] < stop:
+            offset = self._offsets[index]
+            chunk = self._chunks[index]
+            yield chunk, max(start - offset, 0), min(stop - offset, len(chunk[0]))
+            index += 1
+
+    def columns(self, start: int = 0, stop: int = None):
+        """(inputs, unit_ids, results, label_ids) arrays for rows start..stop"""
+        import numpy as np
+
+        stop = self._length if stop is None else min(stop, self._length)
+        pieces = [[column[lo:hi] for column in chunk] for chunk, lo, hi in self._pieces(start, stop)]
+        if not pieces:
+            return (np.empty(0, np.float64), np.empty(0, np.int16), np.empty(0, np.float64), np.empty(0, np.int32))
+        return tuple(np.concatenate(column) for column in zip(*pieces))
+
+    def rows(self, start: int = 0, stop: int = None) -> List[Dict[str, str]]:
+        """Formatted rows start..stop, as shown in the Bulk Calc tab"""
+        stop = self._length if stop is None else min(stop, self._length)
+        rows = []
+        for (inputs, unit_ids, results, label_ids), lo, hi in self._pieces(start, stop):
+            labels = [self.labels[i] if i >= 0 else None for i in label_ids[lo:hi].tolist()]
+            row_units = [self.unit_codes[i] for i in unit_ids[lo:hi].tolist()]
+            rows.extend(format_basket_rows(self.mode, labels, inputs[lo:hi].tolist(), row_units, results[lo:hi]))
+        return rows
+
+    def chunks(self) -> Iterator[Tuple]:
+        """(inputs, unit_ids, results, label_ids) arrays per stored chunk"""
+        return iter(self._chunks)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for start in range(0, self._length, self.FORMAT_CHUNK):
+            yield from self.rows(start, start + self.FORMAT_CHUNK)
+
+
+# Zero-dependency binary export: magic, little-endian uint32 header length,
+# JSON header, then each column as one contiguous little-endian array
+BINARY_MAGIC = b"LMBULK01"
+BINARY_COLUMNS = (("input", "<f8"), ("unit_id", "<i2"), ("result", "<f8"), ("label_id", "<i4"))
+
+
+def write_bulk_binary(path: str, results: BulkResults):
+    """Write raw numeric columns plus a JSON header with the unit and label tables"""
+    import json
+    import struct
+
+    header = json.dumps({
+        "mode": results.mode,
+        "rows": len(results),
+        "unit_codes": results.unit_codes,
+        "labels": results.labels,
+        "columns": [list(column) for column in BINARY_COLUMNS]
+    }).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(BINARY_MAGIC + struct.pack('<I', len(header)) + header)
+        for index, (name, dtype) in enumerate(BINARY_COLUMNS):
+            for chunk in results.chunks():
+                f.write(chunk[index].astype(dtype, copy=False).tobytes())
+
+
+def read_bulk_binary(path: str) -> BulkResults:
+    """Load a file written by write_bulk_binary"""
+    import json
+    import struct
+
+    import numpy as np
+
+    with open(path, 'rb') as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a bulk results file")
+        (header_size,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_size))
+        rows = header["rows"]
+        columns = [np.fromfile(f, dtype=dtype, count=rows) for _, dtype in header["columns"]]
+    if any(len(column) != rows for column in columns):
+        raise ValueError(f"{path} is truncated")
+    bulk = BulkResults(header["mode"], header["unit_codes"])
+    for label in header["labels"]:
+        bulk._label_id(label)
+    bulk._append_chunk(*columns)
+    return bulk
+
+
+def _arrow_batches(results: BulkResults):
+    """Schema and record batches for Arrow and Parquet export"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("Arrow and Parquet export need pyarrow (pip install pyarrow)") from None
+
+    unit_codes = pa.array(results.unit_codes, type=pa.string())
+    labels = pa.array(results.labels, type=pa.string())
+    schema = pa.schema([
+        ("input", pa.float64()),
+        ("unit", pa.dictionary(pa.int16(), pa.string())),
+        ("result", pa.float64()),
+        ("label", pa.dictionary(pa.int32(), pa.string()))
+    ], metadata={"mode": results.mode})
+
+    def batches():
+        for inputs, unit_ids, values, label_ids in results.chunks():
+            yield pa.record_batch([
+                pa.array(inputs),
+                pa.DictionaryArray.from_arrays(unit_ids, unit_codes),
+                pa.array(values),
+                pa.DictionaryArray.from_arrays(pa.array(label_ids, mask=label_ids < 0), labels)
+            ], schema=schema)
+
+    return schema, batches()
+
+
+def write_bulk_arrow(path: str, results: BulkResults):
+    """Write an Arrow IPC (Feather v2) file; needs pyarrow"""
+    schema, batches = _arrow_batches(results)
+    import pyarrow as pa
+
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def write_bulk_parquet(path: str, results: BulkResults):
+    """Write a Parquet file; needs pyarrow"""
+    schema, batches = _arrow_batches(results)
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def write_bulk_csv_file(path: str, results: BulkResults):
+    """Write formatted rows to a CSV file"""
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        write_bulk_csv(csvfile, results)
+
+
+BULK_EXPORT_FORMATS = {
+    ".csv": write_bulk_csv_file,
+    ".parquet": write_bulk_parquet,
+    ".arrow": write_bulk_arrow,
+    ".feather": write_bulk_arrow,
+    ".lmb": write_bulk_binary
+}
+
+
+def export_bulk(path: str, results: BulkResults):
+    """Export results in the format picked by the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    writer = BULK_EXPORT_FORMATS.get(extension)
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {extension or path}")
+    writer(path, results)
+
+
+def calculate_bulk_lines(lines: List[str], engine: PricingEngine, mode: str, unit: str,
+                         catalog=None, first_line: int = 1) -> BulkResults:
+    """Parse and calculate bulk input lines, plain numbers or structured rows"""
+    if not is_structured(lines):
+        values = parse_values(lines, first_line=first_line)
+        results = calculate_bulk_values(engine, mode, values, unit) if values else []
+        return BulkResults.from_columns(mode, values, engine.units.unit_id(unit), results, units=engine.units)
+    labels, quantities, row_units, prices, base_units = parse_basket(lines, engine, unit, catalog, first_line)
+    if not quantities:
+        return BulkResults(mode, engine.units.codes)
+    results = price_basket(mode, quantities, row_units, prices, base_units, engine.units)
+    unit_ids = engine.units.unit_ids(row_units, len(quantities))
+    return BulkResults.from_columns(mode, quantities, unit_ids, results, labels, engine.units)
+
+
+# Job state of a pool worker, sent once per process by _init_worker
+_worker_job = None
+
+
+def _init_worker(engine, mode, unit, catalog):
+    global _worker_job
+    _worker_job = (engine, mode, unit, catalog)
+
+
+def _calculate_shard(shard: Tuple[List[str], int]) -> BulkResults:
+    lines, first_line = shard
+    engine, mode, unit, catalog = _worker_job
+    return calculate_bulk_lines(lines, engine, mode, unit, catalog, first_line)
+
+
+def _ordered_map(executor, fn, items: Iterable, window: int) -> Iterator:
+    """Like executor.map, but keeps at most `window` items in flight"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _worker_count(workers) -> int:
+    return (os.cpu_count() or 1) if workers is None else workers
+
+
+def _process_pool(workers: int, engine: PricingEngine, mode: str, unit: str, catalog):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Never fork: the pool is started from a worker thread of a process
+    # that runs other threads (Tk, persistence, catalog loading)
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_worker,
+        initargs=(engine, mode, unit, catalog)
+    )
+
+
+def iter_bulk_batches(lines: List[str], engine: PricingEngine, mode: str, unit: str, catalog=None,
+                      batch_size: int = DEFAULT_CHUNK_SIZE, workers: int = None,
+                      min_lines: int = PARALLEL_MIN_LINES) -> Iterator[BulkResults]:
+    """Yield BulkResults batch by batch, in input order.
+
+    Batches are sharded across a process pool when there are at least
+    `min_lines` lines and more than one worker (`workers` defaults to the
+    CPU count). Closing the generator early cancels outstanding batches.
+    """
+    workers = _worker_count(workers)
+    batches = ((lines[start:start + batch_size], start + 1) for start in range(0, len(lines), batch_size))
+    if workers <= 1 or len(lines) < min_lines:
+        for batch, first_line in batches:
+            yield calculate_bulk_lines(batch, engine, mode, unit, catalog, first_line)
+        return
+    executor = _process_pool(workers, engine, mode, unit, catalog)
+    try:
+        yield from _ordered_map(executor, _calculate_shard, batches, workers * 2)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def calculate_bulk_parallel(lines: List[str], engine: PricingEngine, mode: str, unit: str, catalog=None,
+                            workers: int = None, min_lines: int = PARALLEL_MIN_LINES,
+                            shard_size: int = None) -> BulkResults:
+    """calculate_bulk_lines sharded across a process pool, results in input order.
+
+    Runs in-process when there are fewer than `min_lines` lines or only one
+    worker. `workers` defaults to the CPU count.
+    """
+    workers = _worker_count(workers)
+    if workers <= 1 or len(lines) < min_lines:
+        return calculate_bulk_lines(lines, engine, mode, unit, catalog)
+    # A few shards per worker evens out uneven lines without much pickling overhead
+    shard_size = shard_size or max(-(-len(lines) // (workers * 4)), 10_000)
+    results = BulkResults(mode, engine.units.codes)
+    for batch in iter_bulk_batches(lines, engine, mode, unit, catalog, shard_size, workers, min_lines):
+        results.extend(batch)
+    return results
+
+
+def read_chunks(infile: TextIO, chunk_size: int) -> Iterator[Tuple[List[str], int]]:
+    """Yield (lines, first line number) chunks from a file"""
+    line_no = 1
+    while True:
+        lines = list(islice(infile, chunk_size))
+        if not lines:
+            return
+        yield lines, line_no
+        line_no += len(lines)
+
+
+def iter_bulk_file(infile: TextIO, engine: PricingEngine, mode: str, unit: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, catalog=None, workers: int = 1) -> Iterator[BulkResults]:
+    """Yield BulkResults for `infile` chunk by chunk, in input order.
+
+    Only a bounded number of chunks (one, or two per worker) is held in
+    memory at a time, so input size is unbounded.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    return _iter_bulk_chunks(read_chunks(infile, chunk_size), engine, mode, unit, catalog, _worker_count(workers))
+
+
+def _iter_bulk_chunks(chunks, engine, mode, unit, catalog, workers):
+    if workers <= 1:
+        for lines, first_line in chunks:
+            yield calculate_bulk_lines(lines, engine, mode, unit, catalog, first_line)
+        return
+    with _process_pool(workers, engine, mode, unit, catalog) as executor:
+        yield from _ordered_map(executor, _calculate_shard, chunks, workers * 2)
+
+
+def stream_bulk(infile: TextIO, outfile: TextIO, engine: PricingEngine, mode: str, unit: str,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, catalog=None, workers: int = 1) -> int:
+    """Convert values from `infile` chunk by chunk and append CSV rows to `outfile`.
+
+    Returns the number of rows written.
+    """
+    total = 0
+    batches = iter_bulk_file(infile, engine, mode, unit, chunk_size, catalog, workers)
+    write_bulk_csv(outfile, [])
+    for rows in batches:
+        write_bulk_csv(outfile, rows, header=False)
+        total += len(rows)
+    outfile.flush()
+    return total
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream bulk calculations from a file or stdin to CSV")
+    parser.add_argument("input", help="Input file with one value or one 'SKU or price, quantity, unit' row "
+                                      "per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output CSV file, or - for stdout")
+    parser.add_argument("--price", type=float, required=True, help="Price per base unit")
+    parser.add_argument("--base-unit", default="kg", choices=DEFAULT_REGISTRY.codes)
+    parser.add_argument("--unit", default="g", choices=DEFAULT_REGISTRY.codes, help="Unit of input weights / results")
+    parser.add_argument("--mode", default="weight_to_price", choices=["weight_to_price", "price_to_weight"])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--catalog", help="Product catalog JSON for resolving SKUs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes (0 = one per CPU)")
+    args = parser.parse_args(argv)
+
+    engine = PricingEngine(args.price, args.base_unit)
+    catalog = None
+    if args.catalog:
+        from catalog import ProductCatalog
+
+        catalog = ProductCatalog.load(args.catalog)
+    infile = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+    outfile = sys.stdout if args.output == "-" else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        stream_bulk(infile, outfile, engine, args.mode, args.unit, args.chunk_size, catalog,
+                    args.workers or None)
+    except ValueError as e:
+        print(f"Error processing values: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
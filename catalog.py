@@ -0,0 +1,164 @@
+import os
+import sys
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List
+
+import serialization
+from data_manager import atomic_write_json
+from units import DEFAULT_REGISTRY
+
+CATALOG_FILE = "light_measure_catalog.json"
+
+
+@dataclass
+class Product:
+    sku: str
+    name: str
+    price: float  # Price per one base_unit
+    base_unit: str = "kg"
+
+    @property
+    def display(self) -> str:
+        return f"{self.sku} — {self.name}"
+
+    def to_dict(self) -> Dict:
+        return {"sku": self.sku, "name": self.name, "price": self.price, "base_unit": self.base_unit}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Product":
+        product = cls(str(data["sku"]), str(data["name"]), float(data["price"]), data.get("base_unit", "kg"))
+        product.validate()
+        return product
+
+    def validate(self):
+        if not self.sku:
+            raise ValueError("Product SKU must not be empty")
+        if self.price < 0:
+            raise ValueError(f"Product {self.sku}: price must not be negative")
+        if self.base_unit not in DEFAULT_REGISTRY:
+            raise ValueError(f"Product {self.sku}: unknown unit {self.base_unit}")
+
+
+class ProductCatalog:
+    """Products indexed by SKU, with a sorted prefix index for type-ahead.
+
+    SKU lookups are a dict hit. search() bisects a sorted list of lowercase
+    keys (the SKU, the full name and each word of the name), so prefix
+    matching stays logarithmic however many products are loaded.
+    """
+
+    def __init__(self, products: Iterable[Product] = ()):
+        self._by_sku: Dict[str, Product] = {}
+        for product in products:
+            self._by_sku[product.sku] = product
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        self._keys = sorted(
+            (key, product.sku) for product in self._by_sku.values() for key in self._index_keys(product)
+        )
+
+    @staticmethod
+    def _index_keys(product: Product) -> List[str]:
+        name = product.name.lower()
+        return sorted({product.sku.lower(), name, *name.split()})
+
+    def __len__(self) -> int:
+        return len(self._by_sku)
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(self._by_sku.values())
+
+    def __contains__(self, sku) -> bool:
+        return sku in self._by_sku
+
+    def get(self, sku: str) -> Product:
+        """Product for an exact SKU, or None"""
+        return self._by_sku.get(sku)
+
+    def add(self, product: Product):
+        """Add or replace a product"""
+        product.validate()
+        if product.sku in self._by_sku:
+            self.remove(product.sku)
+        self._by_sku[product.sku] = product
+        for key in self._index_keys(product):
+            insort(self._keys, (key, product.sku))
+
+    def remove(self, sku: str):
+        product = self._by_sku.pop(sku)
+        for key in self._index_keys(product):
+            index = bisect_left(self._keys, (key, sku))
+            del self._keys[index]
+
+    def search(self, prefix: str, limit: int = 20) -> List[Product]:
+        """Products whose SKU, name or any name word starts with `prefix`"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        results, seen = [], set()
+        index = bisect_left(self._keys, (prefix, ""))
+        while index < len(self._keys) and len(results) < limit:
+            key, sku = self._keys[index]
+            if not key.startswith(prefix):
+                break
+            if sku not in seen:
+                seen.add(sku)
+                results.append(self._by_sku[sku])
+            index += 1
+        return results
+
+    @classmethod
+    def load(cls, path: str = CATALOG_FILE) -> "ProductCatalog":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'rb') as f:
+            data = serialization.loads(f.read())
+        return cls(Product.from_dict(item) for item in data.get("products", []))
+
+    def save(self, path: str = CATALOG_FILE):
+        atomic_write_json(path, {"products": [product.to_dict() for product in self]})
+
+    def import_csv(self, csvfile) -> int:
+        """Add products from CSV rows with sku, name, price and optional base_unit columns"""
+        import csv
+
+        products = [Product.from_dict(row) for row in csv.DictReader(csvfile)]
+        for product in products:
+            self._by_sku[product.sku] = product
+        # One sort beats an insort per row for large imports
+        self._rebuild_index()
+        return len(products)
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the product catalog")
+    parser.add_argument("--catalog", default=CATALOG_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_cmd = commands.add_parser("import", help="Import products from CSV (sku,name,price,base_unit)")
+    import_cmd.add_argument("csv_file")
+    search_cmd = commands.add_parser("search", help="Find products by SKU or name prefix")
+    search_cmd.add_argument("prefix")
+    args = parser.parse_args(argv)
+
+    try:
+        catalog = ProductCatalog.load(args.catalog)
+        if args.command == "import":
+            with open(args.csv_file, 'r', newline='', encoding='utf-8') as f:
+                count = catalog.import_csv(f)
+            catalog.save(args.catalog)
+            print(f"Imported {count} products ({len(catalog)} in catalog)")
+        else:
+            for product in catalog.search(args.prefix):
+                print(f"{product.display}: ₹{product.price} per {product.base_unit}")
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
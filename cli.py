@@ -0,0 +1,188 @@
+"""Command-line entry point: `python -m light_measure <command> ...`
+
+Shares the GUI's calculation core but never imports ttkbootstrap or PIL,
+so it starts fast enough to be called from shell pipelines and cron jobs.
+"""
+import sys
+from typing import Tuple
+
+from pricing_engine import PricingEngine, validate_number
+from units import DEFAULT_REGISTRY
+
+def parse_rate(rate: str, base_unit: str = "kg") -> Tuple[float, str]:
+    """Parse a rate such as "100/kg" or "₹100" into (price, base unit)"""
+    price, _, unit = rate.partition('/')
+    unit = unit.strip() or base_unit
+    try:
+        value = float(price.strip().lstrip('₹'))
+    except ValueError:
+        raise ValueError(f"Invalid rate: {rate}") from None
+    if unit not in DEFAULT_REGISTRY:
+        raise ValueError(f"Unknown unit: {unit}")
+    return value, unit
+
+
+def print_result(args, engine: PricingEngine, mode, input_value, result):
+    if args.json:
+        import serialization
+        from data_manager import make_history_record
+
+        print(serialization.dumps(make_history_record(
+            mode, input_value, args.unit, engine.base_unit, engine.price_per_base, result
+        )).decode('utf-8'))
+    else:
+        print(f"{result:.2f}")
+
+
+def parse_date(text: str) -> float:
+    """Local midnight of a YYYY-MM-DD date as a timestamp"""
+    import time
+
+    try:
+        return time.mktime(time.strptime(text, "%Y-%m-%d"))
+    except ValueError:
+        raise ValueError(f"Invalid date (expected YYYY-MM-DD): {text}") from None
+
+
+def print_totals(totals, as_json):
+    if as_json:
+        import serialization
+
+        print(serialization.dumps(totals).decode('utf-8'))
+        return
+    for mode, stats in totals.items():
+        print(f"{mode:<16}{stats['count']:>10} calculations  inputs {stats['input_total']:>14.2f}"
+              f"  results {stats['result_total']:>14.2f}")
+
+
+def history_command(args) -> int:
+    from data_manager import DataManager, format_history_entry, history_mask, history_totals
+
+    try:
+        manager = DataManager()
+        manager.load_data(read_only=True)
+        try:
+            if args.totals:
+                columns = manager.history_columns(args.since, args.until)
+                if args.mode is not None:
+                    mask = history_mask(columns, args.mode)
+                    columns = {field: values[mask] for field, values in columns.items()}
+                print_totals(history_totals(columns), args.json)
+                return 0
+            entries = manager.query_history(args.mode, args.since, args.until, args.limit)
+        finally:
+            manager.close()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for entry in entries:
+        if args.json:
+            import serialization
+
+            print(serialization.dumps(entry).decode('utf-8'))
+        else:
+            print(format_history_entry(entry), end="")
+    return 0
+
+
+def bulk_command(args, engine: PricingEngine) -> int:
+    """Stream CSV output, or collect the columns for a columnar export"""
+    from bulk import BulkResults, export_bulk, iter_bulk_file, stream_bulk
+
+    catalog = None
+    if args.catalog:
+        from catalog import ProductCatalog
+
+        catalog = ProductCatalog.load(args.catalog)
+    workers = args.workers or None
+    infile = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+    try:
+        if args.output == "-" or args.output.lower().endswith(".csv"):
+            outfile = sys.stdout if args.output == "-" else open(args.output, 'w', newline='', encoding='utf-8')
+            try:
+                return stream_bulk(infile, outfile, engine, args.mode, args.unit, args.chunk_size, catalog, workers)
+            finally:
+                if outfile is not sys.stdout:
+                    outfile.close()
+        results = BulkResults(args.mode, engine.units.codes)
+        for batch in iter_bulk_file(infile, engine, args.mode, args.unit, args.chunk_size, catalog, workers):
+            results.extend(batch)
+        export_bulk(args.output, results)
+        return len(results)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+
+
+def main(argv=None) -> int:
+    import argparse
+    from concurrent.futures.process import BrokenProcessPool
+
+    from bulk import DEFAULT_CHUNK_SIZE
+
+    parser = argparse.ArgumentParser(prog="light_measure", description="Grocery price and weight calculations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rate_help = "Price per base unit, e.g. 100/kg (base unit defaults to kg)"
+
+    price_cmd = commands.add_parser("price", help="Price of a weight")
+    price_cmd.add_argument("--weight", type=float, required=True)
+    weight_cmd = commands.add_parser("weight", help="Weight a price buys")
+    weight_cmd.add_argument("--price", type=float, required=True)
+    for command in (price_cmd, weight_cmd):
+        command.add_argument("--rate", required=True, help=rate_help)
+        command.add_argument("--unit", default="g", choices=DEFAULT_REGISTRY.codes)
+        command.add_argument("--json", action="store_true", help="Print a JSON record instead of the number")
+
+    bulk_cmd = commands.add_parser("bulk", help="Calculate a file of values or 'SKU or price, quantity, unit' rows")
+    bulk_cmd.add_argument("input", help="Input file, or - for stdin")
+    bulk_cmd.add_argument("-o", "--output", default="-",
+                          help="Output .csv, .parquet, .arrow/.feather or .lmb file, or - for CSV on stdout")
+    bulk_cmd.add_argument("--rate", required=True, help=rate_help)
+    bulk_cmd.add_argument("--unit", default="g", choices=DEFAULT_REGISTRY.codes, help="Unit of input weights / results")
+    bulk_cmd.add_argument("--mode", default="weight_to_price", choices=["weight_to_price", "price_to_weight"])
+    bulk_cmd.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    bulk_cmd.add_argument("--catalog", help="Product catalog JSON for resolving SKUs")
+    bulk_cmd.add_argument("--workers", type=int, default=1, help="Worker processes (0 = one per CPU)")
+
+    history_cmd = commands.add_parser("history", help="Search recorded history, including monthly archives")
+    history_cmd.add_argument("--mode", choices=["weight_to_price", "price_to_weight", "bulk"])
+    history_cmd.add_argument("--since", type=parse_date, help="YYYY-MM-DD (inclusive)")
+    history_cmd.add_argument("--until", type=parse_date, help="YYYY-MM-DD (exclusive)")
+    history_cmd.add_argument("--limit", type=int, default=100)
+    history_cmd.add_argument("--totals", action="store_true", help="Print count and sums per mode instead of entries")
+    history_cmd.add_argument("--json", action="store_true", help="Print one JSON record per line")
+
+    serve_cmd = commands.add_parser("serve", help="Run the HTTP/JSON pricing service")
+    serve_cmd.add_argument("--host", default="127.0.0.1", help="Address to bind (0.0.0.0 for the whole LAN)")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from service import run
+
+        run(args.host, args.port)
+        return 0
+
+    if args.command == "history":
+        return history_command(args)
+
+    try:
+        engine = PricingEngine(*parse_rate(args.rate))
+        if args.command == "price":
+            if not validate_number(args.weight):
+                raise ValueError(f"Invalid weight: {args.weight}")
+            print_result(args, engine, "weight_to_price", args.weight, engine.calculate_price(args.weight, args.unit))
+        elif args.command == "weight":
+            if not validate_number(args.price):
+                raise ValueError(f"Invalid price: {args.price}")
+            print_result(args, engine, "price_to_weight", args.price, engine.calculate_weight(args.price, args.unit))
+        else:
+            bulk_command(args, engine)
+    except (OSError, ValueError, BrokenProcessPool) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,155 +1,1207 @@
-import ttkbootstrap as ttk
-from ttkbootstrap.constants import *
-from data_manager import DataManager # type: ignore
-
-class LightMeasureApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Light Measure")
-        self.root.geometry("400x600")
-        
-        # Initialize data manager
-        self.data_manager = DataManager()
-        
-        # Load saved data
-        saved_data = self.data_manager.load_data()
-        
-        # Set theme and colors
-        self.style = ttk.Style("darkly")
-        self.primary_color = "primary"
-        
-        # Variables
-        self.price_per_kg = ttk.StringVar(value=saved_data["default_price"])
-        self.preferred_unit = ttk.StringVar(value=saved_data["preferred_unit"])
-        self.calculation_history = saved_data["history"]
-        
-        # Unit conversion factors (to grams)
-        self.unit_factors = {
-            "g": 1,
-            "kg": 1000,
-            "lb": 453.592,
-            "oz": 28.3495
+import math
+import os
+import struct
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Dict, Optional
+
+import serialization
+from metrics import METRICS
+
+HISTORY_FIELDS = ("timestamp", "mode", "input_value", "input_unit", "base_unit", "price_per_base", "result")
+
+
+@dataclass
+class HistoryRecord:
+    """One recorded calculation; formatted only when it is displayed"""
+    __slots__ = HISTORY_FIELDS
+
+    timestamp: float
+    mode: str
+    input_value: Optional[float]
+    input_unit: Optional[str]
+    base_unit: Optional[str]
+    price_per_base: Optional[float]
+    result: Optional[float]
+
+    @classmethod
+    def from_dict(cls, data):
+        get = data.get
+        return cls(get("timestamp") or 0.0, get("mode"), get("input_value"), get("input_unit"),
+                   get("base_unit"), get("price_per_base"), get("result"))
+
+    def as_row(self):
+        return (self.timestamp, self.mode, self.input_value, self.input_unit,
+                self.base_unit, self.price_per_base, self.result)
+
+
+def make_history_record(mode, input_value, input_unit, base_unit, price_per_base, result=None, timestamp=None):
+    """Build a structured history record"""
+    return HistoryRecord(
+        time.time() if timestamp is None else timestamp,
+        mode,
+        input_value,
+        input_unit,
+        base_unit,
+        price_per_base,
+        result
+    )
+
+
+def format_history_entry(entry) -> str:
+    """Render a history record as the line shown in the history popup"""
+    if isinstance(entry, str):
+        # Preformatted entry from an older history file
+        return entry
+    mode = entry.mode
+    if mode == "weight_to_price":
+        return f"Weight: {entry.input_value}{entry.input_unit} → Total Price: ₹{entry.result:.2f}\n"
+    if mode == "price_to_weight":
+        return f"Price: ₹{entry.input_value} → Weight: {entry.result:.2f} {entry.input_unit}\n"
+    return f"Bulk calculation: {int(entry.input_value)} items processed\n"
+
+
+def history_columns(entries) -> Dict:
+    """History records as NumPy columns (None becomes NaN); legacy text entries are skipped"""
+    import numpy as np
+
+    records = [entry for entry in entries if not isinstance(entry, str)]
+    count = len(records)
+    nan = math.nan
+
+    def numbers(field):
+        values = map(attrgetter(field), records)
+        return np.fromiter((nan if value is None else value for value in values), np.float64, count)
+
+    def labels(field):
+        return np.array([value or "" for value in map(attrgetter(field), records)], dtype=str)
+
+    return {
+        "timestamp": numbers("timestamp"),
+        "mode": labels("mode"),
+        "input_value": numbers("input_value"),
+        "input_unit": labels("input_unit"),
+        "base_unit": labels("base_unit"),
+        "price_per_base": numbers("price_per_base"),
+        "result": numbers("result")
+    }
+
+
+def history_mask(columns, mode=None, start=None, end=None):
+    """Boolean mask of the rows matching a mode and/or timestamp range"""
+    import numpy as np
+
+    mask = np.ones(len(columns["timestamp"]), dtype=bool)
+    if mode is not None:
+        mask &= columns["mode"] == mode
+    if start is not None:
+        mask &= columns["timestamp"] >= start
+    if end is not None:
+        mask &= columns["timestamp"] < end
+    return mask
+
+
+def history_totals(columns) -> Dict:
+    """Count and input/result sums per mode over history columns"""
+    import numpy as np
+
+    modes = columns["mode"]
+    totals = {}
+    for mode in np.unique(modes):
+        selected = modes == mode
+        totals[str(mode)] = {
+            "count": int(selected.sum()),
+            "input_total": float(np.nansum(columns["input_value"][selected])),
+            "result_total": float(np.nansum(columns["result"][selected]))
         }
-        
-        self.create_widgets()
-        
-    def create_widgets(self):
-        # ... (previous code remains the same until price frame) ...
-        
-        # Add unit selection
-        unit_frame = ttk.LabelFrame(
-            main_container, # type: ignore
-            text="Unit Selection",
-            padding=15,
-            bootstyle="primary"
-        )
-        unit_frame.pack(fill='x', pady=10)
-        
-        for unit in ["g", "kg", "lb", "oz"]:
-            ttk.Radiobutton(
-                unit_frame,
-                text=unit.upper(),
-                variable=self.preferred_unit,
-                value=unit,
-                bootstyle="primary-toolbutton"
-            ).pack(side='left', padx=5, expand=True)
-        
-        # ... (rest of the widget creation code) ...
-
-    def convert_to_grams(self, value, from_unit):
-        return value * self.unit_factors[from_unit]
-        
-    def convert_from_grams(self, grams, to_unit):
-        return grams / self.unit_factors[to_unit]
-
-    def calculate_price(self):
+    return totals
+
+
+def atomic_write_json(path, data):
+    """Write JSON to a temp file and rename it over `path` so a crash never leaves a torn file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(serialization.dumps(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class BackgroundWriter:
+    """Run disk writes on one daemon thread, coalescing bursts.
+
+    Jobs are submitted under a key; a newer job for the same key replaces
+    one that has not run yet. Pending jobs run together once `delay`
+    seconds have passed since the first of them was submitted, so a burst
+    of clicks costs one write instead of one per click.
+    """
+
+    def __init__(self, delay=0.25):
+        self.delay = delay
+        self._pending = {}
+        self._due = None
+        self._running = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, job):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BackgroundWriter is closed")
+            self._pending[key] = job
+            if self._due is None:
+                self._due = time.monotonic() + self.delay
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._due is None or time.monotonic() < self._due):
+                    self._cond.wait(None if self._due is None else self._due - time.monotonic())
+                if self._closed and not self._pending:
+                    return
+                jobs = list(self._pending.items())
+                self._pending = {}
+                self._due = None
+                self._running = True
+            try:
+                for key, job in jobs:
+                    try:
+                        # The real disk latency; callers only time the queueing
+                        with METRICS.timer(f"write {key if isinstance(key, str) else key[0]}"):
+                            job()
+                    except Exception as e:
+                        # Keep the writer alive; the next change retries the write
+                        print(f"Background write failed: {e}", file=sys.stderr)
+            finally:
+                with self._cond:
+                    self._running = False
+                    self._cond.notify_all()
+
+    def flush(self):
+        """Run pending jobs now and wait until they are written"""
+        with self._cond:
+            if self._pending:
+                self._due = time.monotonic()
+                self._cond.notify_all()
+            while self._pending or self._running:
+                self._cond.wait()
+
+    def close(self):
+        """Flush and stop the thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+class HistoryLog(Sequence):
+    """Append-only calculation history stored as JSON Lines.
+
+    Every entry is one JSON line, so recording a calculation is a single
+    append regardless of how long the history is. A `null` line marks a
+    "Clear History"; everything before it is dead and is dropped by
+    compaction, which rewrites the file in the background.
+    """
+
+    # Compact when dead lines exceed both this count and the live entries
+    COMPACT_THRESHOLD = 1000
+
+    def __init__(self, path, fsync=True, writer: BackgroundWriter = None, read_only=False):
+        self.path = path
+        self.fsync = fsync
+        self.writer = writer
+        self.read_only = read_only
+        self._pending = []
+        self._entries = []
+        self._dead_lines = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._compactor = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        torn_tail = bool(data) and not data.endswith(b'\n')
+        # Only the lines after the last clear marker are live, so nothing
+        # before it is decoded (a raw newline never occurs inside a line)
+        marker = data.rfind(b'\nnull\n') + 1 or (0 if data.startswith(b'null\n') else -1)
+        if marker >= 0:
+            self._dead_lines = data.count(b'\n', 0, marker) + 1
+            data = data[marker + len(b'null\n'):]
+        entries = serialization.loads_lines(data, HistoryRecord)
+        if serialization.INVALID in entries:
+            # Torn writes from a crash are dead lines too; compaction drops them
+            self._entries = [entry for entry in entries if entry is not serialization.INVALID]
+            self._dead_lines += len(entries) - len(self._entries)
+        else:
+            self._entries = entries
+        if self.read_only:
+            return
+        if torn_tail:
+            # Never append after a partial line
+            self.compact()
+        elif self._dead_lines > self.COMPACT_THRESHOLD and self._dead_lines > len(self._entries):
+            self.compact_in_background()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        return self._entries[index]
+
+    def page(self, offset, limit):
+        """Return up to `limit` entries starting at `offset` (oldest first)"""
+        return self._entries[offset:offset + limit]
+
+    def _write(self, text):
+        """Append encoded lines to the log, or queue them for the writer; callers hold self._lock"""
+        if self.writer is not None:
+            self._pending.append(text)
+            self.writer.submit(("history", self.path), self.flush_pending)
+            return
+        self._write_now(text)
+
+    def _write_now(self, text):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        size = os.fstat(self._file.fileno()).st_size
         try:
-            if not self.price_per_kg.get():
-                ttk.Messagebox.show_error(
-                    title="Error",
-                    message="Please enter price per kg first"
-                )
-                return
-                
-            weight = self.weight_entry.get()
-            if not self.validate_number(weight):
-                ttk.Messagebox.show_error(
-                    title="Error",
-                    message="Please enter a valid positive number"
-                )
-                return
-                
-            weight = float(weight)
-            # Convert input weight to grams
-            weight_in_grams = self.convert_to_grams(weight, self.preferred_unit.get())
-            price = (weight_in_grams / 1000) * float(self.price_per_kg.get())
-            result_text = f"Total Price: ₹{price:.2f}"
-            
-            self.price_result.config(
-                text=result_text,
-                bootstyle="primary"
-            )
-            
-            # Add to history with unit
-            history_entry = f"Weight: {weight}{self.preferred_unit.get()} → {result_text}\n"
-            self.calculation_history.append(history_entry)
-            self.update_history()
-            self.save_data()
-            
-        except ValueError:
-            ttk.Messagebox.show_error(
-                title="Error",
-                message="Please enter valid numbers"
+            self._file.write(text)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except OSError:
+            # Drop a partial write so a retry does not follow a torn line
+            self._file.close()
+            self._file = None
+            with open(self.path, 'r+b') as f:
+                f.truncate(size)
+            raise
+
+    def flush_pending(self):
+        """Write queued lines with a single write and fsync"""
+        with self._lock:
+            if self._pending:
+                # Dequeued only once written, so a failed write is retried
+                self._write_now(b''.join(self._pending))
+                self._pending = []
+
+    def append(self, entry):
+        """Record one entry with a single constant-time append"""
+        line = serialization.dumps(entry) + b'\n'
+        with self._lock:
+            self._write(line)
+            self._entries.append(entry)
+
+    def extend(self, entries):
+        """Record several entries with one write"""
+        entries = list(entries)
+        text = b''.join(serialization.dumps(entry) + b'\n' for entry in entries)
+        with self._lock:
+            self._write(text)
+            self._entries.extend(entries)
+
+    def clear(self):
+        """Drop all entries by appending a clear marker"""
+        with self._lock:
+            self._write(b'null\n')
+            self._dead_lines += len(self._entries) + 1
+            self._entries = []
+        self.compact_in_background()
+
+    def compact(self):
+        """Rewrite the log with only the live entries"""
+        with self._lock:
+            entries = list(self._entries)
+            # Queued lines are already in the entries being rewritten
+            self._pending = []
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                for entry in entries:
+                    f.write(serialization.dumps(entry) + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._dead_lines = 0
+
+    def drop_oldest(self, count):
+        """Remove the `count` oldest entries and rewrite the log"""
+        if count <= 0:
+            return
+        with self._lock:
+            self._entries = self._entries[count:]
+        self.compact()
+
+    def compact_in_background(self):
+        """Run compact() on a daemon thread unless one is already running"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        self.flush_pending()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SqliteHistoryStore(Sequence):
+    """Calculation history kept as structured rows in SQLite.
+
+    Rows are only ever appended or deleted from the oldest end, so ids are
+    contiguous and length and positional lookups come from the primary key
+    instead of a table scan. Nothing is loaded up front; callers page
+    through rows with page() or query().
+    """
+
+    def __init__(self, path, read_only=False):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        if read_only:
+            from urllib.request import pathname2url
+
+            self._conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True,
+                                         check_same_thread=False)
+            self._first_id, self._count = self._bounds()
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY,
+                timestamp REAL NOT NULL,
+                mode TEXT NOT NULL,
+                input_value REAL,
+                input_unit TEXT,
+                base_unit TEXT,
+                price_per_base REAL,
+                result REAL,
+                text TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_history_mode ON history (mode, timestamp);
+        """)
+        self._first_id, self._count = self._bounds()
+
+    def _bounds(self):
+        first_id, last_id = self._conn.execute("SELECT MIN(id), MAX(id) FROM history").fetchone()
+        if first_id is None:
+            return 0, 0
+        return first_id, last_id - first_id + 1
+
+    @staticmethod
+    def _to_row(entry):
+        if isinstance(entry, str):
+            return (time.time(), "text", None, None, None, None, None, entry)
+        return entry.as_row() + (None,)
+
+    @staticmethod
+    def _from_row(row):
+        if row[-1] is not None:
+            return row[-1]
+        return HistoryRecord(*row[:-1])
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            rows = self.page(start, max(stop - start, 0))
+            return rows[::step]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("history index out of range")
+        return self.page(index, 1)[0]
+
+    def page(self, offset, limit):
+        """Return up to `limit` entries starting at `offset` (oldest first)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(HISTORY_FIELDS)}, text FROM history WHERE id >= ? ORDER BY id LIMIT ?",
+                (self._first_id + offset, limit)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def query(self, mode=None, start=None, end=None, limit=100, offset=0):
+        """Filter entries by mode and/or timestamp range using the indexes"""
+        clauses, params = [], []
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(HISTORY_FIELDS)}, text FROM history {where} ORDER BY timestamp LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def __iter__(self):
+        offset = 0
+        while offset < self._count:
+            entries = self.page(offset, 1000)
+            if not entries:
+                break
+            yield from entries
+            offset += len(entries)
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        rows = [self._to_row(entry) for entry in entries]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO history (timestamp, mode, input_value, input_unit, base_unit, "
+                "price_per_base, result, text) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
             )
+            self._first_id, self._count = self._bounds()
+
+    def drop_oldest(self, count):
+        """Delete the `count` oldest rows"""
+        if count <= 0:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history WHERE id < ?", (self._first_id + count,))
+            self._first_id, self._count = self._bounds()
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history")
+            self._first_id, self._count = 0, 0
 
-    def calculate_weight(self):
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BinaryHistoryStore(Sequence):
+    """Calculation history in a length-prefixed binary file read through mmap.
+
+    Each record is a uint32 payload length followed by either a fixed
+    80-byte structured record or, for legacy entries, UTF-8 text. A side
+    index (`<path>.idx`) holds a fixed 16-byte (offset, timestamp) pair per
+    record, so opening costs nothing however long the history is: len()
+    comes from the index size, any position is one lookup, and a date
+    range is found by bisecting the timestamps. Only the rows asked for
+    are ever decoded.
+    """
+
+    RECORD = struct.Struct('<d16sddd16s16s')  # timestamp, mode, input_value, price_per_base, result, units
+    LABEL_SIZE = 16  # bytes for mode and unit codes
+    RECORD_FIELDS = ("timestamp", "mode", "input_value", "price_per_base", "result", "input_unit", "base_unit")
+    INDEX = struct.Struct('<Qd')  # offset, timestamp
+    LENGTH = struct.Struct('<I')
+
+    def __init__(self, path, fsync=True, writer: BackgroundWriter = None, read_only=False):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.fsync = fsync
+        self.writer = writer
+        self._lock = threading.RLock()
+        self._pending = []  # (entry, encoded record) not yet written
+        self._data = None
+        self._index = None
+        # Whether the first _ordered_count index timestamps are sorted (see _in_time_order)
+        self._ordered = True
+        self._ordered_count = 0
+        if read_only:
+            # Only what the index covers; a tail still being appended is ignored
+            self._data_file = self._index_file = None
+            self._count = os.path.getsize(self.index_path) // self.INDEX.size
+            self._end = self._indexed_end()
+            return
+        self._repair()
+        self._data_file = open(self.path, 'ab')
+        self._index_file = open(self.index_path, 'ab')
+        self._count = os.path.getsize(self.index_path) // self.INDEX.size
+        self._end = os.path.getsize(self.path)
+
+    def _indexed_end(self):
+        """End of the last record the index points to"""
+        if not self._count:
+            return 0
+        with open(self.index_path, 'rb') as index:
+            index.seek((self._count - 1) * self.INDEX.size)
+            offset, _ = self.INDEX.unpack(index.read(self.INDEX.size))
+        with open(self.path, 'rb') as data:
+            data.seek(offset)
+            (length,) = self.LENGTH.unpack(data.read(self.LENGTH.size))
+        return offset + self.LENGTH.size + length
+
+    def _repair(self):
+        """Make the index match the data file after a crash mid-append"""
+        for path in (self.path, self.index_path):
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+        data_size = os.path.getsize(self.path)
+        index_size = os.path.getsize(self.index_path)
+        count = index_size // self.INDEX.size
+        # Drop index entries that point past the data, then re-index any data
+        # records the index is missing and cut off a torn final record
+        with open(self.path, 'rb') as data, open(self.index_path, 'r+b') as index:
+            end = 0
+            while count:
+                index.seek((count - 1) * self.INDEX.size)
+                offset, _ = self.INDEX.unpack(index.read(self.INDEX.size))
+                data.seek(offset)
+                header = data.read(self.LENGTH.size)
+                if len(header) == self.LENGTH.size:
+                    end = offset + self.LENGTH.size + self.LENGTH.unpack(header)[0]
+                    if end <= data_size:
+                        break
+                count -= 1
+                end = 0
+            index.truncate(count * self.INDEX.size)
+            previous = 0.0
+            if count:
+                index.seek((count - 1) * self.INDEX.size)
+                previous = self.INDEX.unpack(index.read(self.INDEX.size))[1]
+            index.seek(count * self.INDEX.size)
+            data.seek(end)
+            while True:
+                header = data.read(self.LENGTH.size)
+                if len(header) < self.LENGTH.size:
+                    break
+                payload = data.read(self.LENGTH.unpack(header)[0])
+                if len(payload) < self.LENGTH.unpack(header)[0]:
+                    break
+                timestamp = self._decode_timestamp(payload)
+                previous = previous if timestamp is None else timestamp
+                index.write(self.INDEX.pack(end, previous))
+                end += self.LENGTH.size + len(payload)
+        if end < data_size:
+            with open(self.path, 'r+b') as data:
+                data.truncate(end)
+
+    @classmethod
+    def _decode_timestamp(cls, payload):
+        """A record's timestamp, or None for legacy text"""
+        return cls.RECORD.unpack_from(payload)[0] if len(payload) == cls.RECORD.size else None
+
+    @classmethod
+    def _encode(cls, entry):
+        """(timestamp, length-prefixed record bytes) for one entry; text has no timestamp"""
+        if isinstance(entry, str):
+            payload = entry.encode('utf-8')
+            if len(payload) == cls.RECORD.size:
+                payload += b'\0'  # keep text distinguishable from a record by length
+            return None, cls.LENGTH.pack(len(payload)) + payload
+        nan = math.nan
+        timestamp = entry.timestamp
+        payload = cls.RECORD.pack(
+            timestamp,
+            cls._label(entry.mode, "mode"),
+            nan if entry.input_value is None else entry.input_value,
+            nan if entry.price_per_base is None else entry.price_per_base,
+            nan if entry.result is None else entry.result,
+            cls._label(entry.input_unit, "input_unit"),
+            cls._label(entry.base_unit, "base_unit")
+        )
+        return timestamp, cls.LENGTH.pack(len(payload)) + payload
+
+    @classmethod
+    def _label(cls, value, field):
+        """UTF-8 bytes for a 16-byte record field; struct would silently truncate longer ones"""
+        encoded = (value or "").encode('utf-8')
+        if len(encoded) > cls.LABEL_SIZE:
+            raise ValueError(f"{field} {value!r} is longer than {cls.LABEL_SIZE} bytes")
+        return encoded
+
+    @classmethod
+    def _decode(cls, payload):
+        if len(payload) != cls.RECORD.size:
+            return payload.rstrip(b'\0').decode('utf-8')
+        timestamp, mode, input_value, price_per_base, result, input_unit, base_unit = cls.RECORD.unpack(payload)
+        return HistoryRecord(
+            timestamp,
+            mode.rstrip(b'\0').decode('utf-8'),
+            None if math.isnan(input_value) else input_value,
+            input_unit.rstrip(b'\0').decode('utf-8') or None,
+            base_unit.rstrip(b'\0').decode('utf-8') or None,
+            None if math.isnan(price_per_base) else price_per_base,
+            None if math.isnan(result) else result
+        )
+
+    def _maps(self):
+        """mmaps of the data and index files, remapped when they have grown"""
+        import mmap
+
+        if self._data is None or len(self._data) < self._end:
+            if self._data is not None:
+                self._data.close()
+                self._index.close()
+            self._data = self._index = None
+            if self._end:
+                with open(self.path, 'rb') as f:
+                    self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                with open(self.index_path, 'rb') as f:
+                    self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data, self._index
+
+    def _read(self, position):
+        data, index = self._maps()
+        offset, _ = self.INDEX.unpack_from(index, position * self.INDEX.size)
+        (length,) = self.LENGTH.unpack_from(data, offset)
+        start = offset + self.LENGTH.size
+        return self._decode(data[start:start + length])
+
+    def _timestamp(self, position):
+        return self.INDEX.unpack_from(self._maps()[1], position * self.INDEX.size)[1]
+
+    def __len__(self):
+        return self._count + len(self._pending)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return self.page(start, max(stop - start, 0))[::step]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        return self.page(index, 1)[0]
+
+    def page(self, offset, limit):
+        """Return up to `limit` entries starting at `offset` (oldest first)"""
+        with self._lock:
+            stop = min(offset + limit, len(self))
+            written = min(stop, self._count)
+            entries = [self._read(position) for position in range(offset, written)]
+            if stop > self._count:
+                entries += [entry for entry, _ in self._pending[max(offset - self._count, 0):stop - self._count]]
+        return entries
+
+    def __iter__(self):
+        offset = 0
+        while offset < len(self):
+            entries = self.page(offset, 1000)
+            yield from entries
+            offset += len(entries)
+
+    def _bisect(self, timestamp):
+        """First written position with a timestamp >= `timestamp` (entries are in time order)"""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamp(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _in_time_order(self):
+        """Whether the index timestamps are sorted, checked incrementally as entries are added"""
+        import numpy as np
+
+        if self._ordered and self._ordered_count < self._count:
+            first = max(self._ordered_count - 1, 0)
+            timestamps = np.frombuffer(self._maps()[1], dtype='<f8', count=(self._count - first) * 2,
+                                       offset=first * self.INDEX.size)[1::2]
+            self._ordered = bool((np.diff(timestamps) >= 0).all())
+            self._ordered_count = self._count
+        return self._ordered
+
+    def _reset_order(self):
+        self._ordered = True
+        self._ordered_count = 0
+
+    def query(self, mode=None, start=None, end=None, limit=100, offset=0):
+        """Filter entries by mode and/or timestamp range, seeking to the range through the index.
+
+        Bisecting needs sorted timestamps; an index that is not (clock
+        changes, or text indexed at 0.0 by older versions) is scanned.
+        """
+        self.flush_pending()
+        with self._lock:
+            first, last = 0, self._count
+            if self._in_time_order():
+                first = self._bisect(start) if start is not None else 0
+                last = self._bisect(end) if end is not None else self._count
+            results = []
+            for position in range(first, last):
+                entry = self._read(position)
+                if isinstance(entry, str):
+                    if mode is not None or start is not None or end is not None:
+                        continue
+                elif ((mode is not None and entry.mode != mode) or (start is not None and entry.timestamp < start)
+                      or (end is not None and entry.timestamp >= end)):
+                    continue
+                if offset:
+                    offset -= 1
+                    continue
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def columns(self):
+        """History columns read straight from the mmap, without decoding any entry"""
+        import numpy as np
+
+        self.flush_pending()
+        with self._lock:
+            data, index = self._maps()
+            stride = self.LENGTH.size + self.RECORD.size
+            dtype = np.dtype({
+                "names": self.RECORD_FIELDS,
+                "formats": ['<f8', 'S16', '<f8', '<f8', '<f8', 'S16', 'S16'],
+                "offsets": [self.LENGTH.size + offset for offset in (0, 8, 24, 32, 40, 48, 64)],
+                "itemsize": stride
+            })
+            if not self._count:
+                return {field: self._column(np.empty(0, dtype)[field]) for field in HISTORY_FIELDS}
+            offsets = np.frombuffer(index, dtype='<u8', count=self._count * 2)[::2]
+            # Records are consecutive fixed-stride runs between legacy text entries
+            text_positions = np.flatnonzero(np.diff(offsets, append=self._end) != stride)
+            runs = []
+            first = 0
+            for stop in [*text_positions.tolist(), self._count]:
+                if stop > first:
+                    runs.append(np.ndarray(stop - first, dtype, buffer=data, offset=int(offsets[first])))
+                first = stop + 1
+            records = np.concatenate(runs) if runs else np.empty(0, dtype)
+            # Both steps copy, so nothing keeps the mmap alive
+            return {field: self._column(records[field]) for field in HISTORY_FIELDS}
+
+    @staticmethod
+    def _column(values):
+        import numpy as np
+
+        if values.dtype.kind != 'S':
+            return values.astype(np.float64)
         try:
-            if not self.price_per_kg.get():
-                ttk.Messagebox.show_error(
-                    title="Error",
-                    message="Please enter price per kg first"
-                )
-                return
-                
-            price = self.price_calc_entry.get()
-            if not self.validate_number(price):
-                ttk.Messagebox.show_error(
-                    title="Error",
-                    message="Please enter a valid positive number"
-                )
+            return values.astype(str)  # ASCII, converted in C
+        except UnicodeDecodeError:
+            return np.char.decode(values, 'utf-8')
+
+    def _write_now(self, encoded):
+        """Append encoded records and their index entries; callers hold self._lock"""
+        index = bytearray()
+        data = bytearray()
+        # Legacy text is indexed at the preceding record's time, keeping the index sorted
+        previous = self._timestamp(self._count - 1) if self._count else 0.0
+        for timestamp, record in encoded:
+            previous = previous if timestamp is None else timestamp
+            index += self.INDEX.pack(self._end + len(data), previous)
+            data += record
+        # Data first: a crash before the index write is repaired on open
+        try:
+            self._data_file.write(data)
+            self._data_file.flush()
+            self._index_file.write(index)
+            self._index_file.flush()
+            if self.fsync:
+                os.fsync(self._data_file.fileno())
+                os.fsync(self._index_file.fileno())
+        except OSError:
+            # Drop a partial write so a retry appends at the recorded offsets
+            self._data_file.close()
+            self._index_file.close()
+            for path, size in ((self.path, self._end), (self.index_path, self._count * self.INDEX.size)):
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+            self._data_file = open(self.path, 'ab')
+            self._index_file = open(self.index_path, 'ab')
+            raise
+        self._end += len(data)
+        self._count += len(encoded)
+
+    def flush_pending(self):
+        with self._lock:
+            if self._pending:
+                # Dequeued only once written, so a failed write is retried
+                self._write_now([record for _, record in self._pending])
+                self._pending = []
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        pending = [(entry, self._encode(entry)) for entry in entries]
+        with self._lock:
+            if self.writer is not None:
+                self._pending.extend(pending)
+                self.writer.submit(("history", self.path), self.flush_pending)
+            else:
+                self._write_now([record for _, record in pending])
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+            self._close_maps()
+            for f in (self._data_file, self._index_file):
+                f.truncate(0)
+                f.flush()
+            self._count = self._end = 0
+            self._reset_order()
+
+    def drop_oldest(self, count):
+        """Rewrite both files without the `count` oldest records"""
+        self.flush_pending()
+        with self._lock:
+            count = min(count, self._count)
+            if count <= 0:
                 return
-                
-            price = float(price)
-            weight_in_grams = (price / float(self.price_per_kg.get())) * 1000
-            # Convert to preferred unit
-            weight = self.convert_from_grams(weight_in_grams, self.preferred_unit.get())
-            result_text = f"Weight: {weight:.2f} {self.preferred_unit.get()}"
-            
-            self.weight_result.config(
-                text=result_text,
-                bootstyle="primary"
-            )
-            
-            # Add to history
-            history_entry = f"Price: ₹{price} → {result_text}\n"
-            self.calculation_history.append(history_entry)
-            self.update_history()
-            self.save_data()
-            
-        except ValueError:
-            ttk.Messagebox.show_error(
-                title="Error",
-                message="Please enter valid numbers"
-            )
+            data, index = self._maps()
+            cut = self.INDEX.unpack_from(index, count * self.INDEX.size)[0] if count < self._count else self._end
+            tail = data[cut:self._end]
+            entries = [self.INDEX.unpack_from(index, i * self.INDEX.size) for i in range(count, self._count)]
+            new_index = b''.join(self.INDEX.pack(offset - cut, timestamp) for offset, timestamp in entries)
+            self._close_maps()
+            self._data_file.close()
+            self._index_file.close()
+            for path, content in ((self.index_path, new_index), (self.path, tail)):
+                with open(f"{path}.tmp", 'wb') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+            # Without an index the data file is re-indexed on open, so a crash
+            # at any point leaves either the old or the new history, never a mix
+            os.remove(self.index_path)
+            os.replace(f"{self.path}.tmp", self.path)
+            os.replace(f"{self.index_path}.tmp", self.index_path)
+            self._data_file = open(self.path, 'ab')
+            self._index_file = open(self.index_path, 'ab')
+            self._count = len(entries)
+            self._end = len(tail)
+            self._reset_order()
+
+    def _close_maps(self):
+        if self._data is not None:
+            self._data.close()
+            self._index.close()
+        self._data = self._index = None
+
+    def close(self):
+        self.flush_pending()
+        with self._lock:
+            self._close_maps()
+            if self._data_file is not None:
+                self._data_file.close()
+                self._index_file.close()
+
+
+class HistoryArchive:
+    """Older history rolled out of the hot store into gzip JSON Lines, one file per month.
+
+    Files are named history-YYYY-MM.jsonl.gz (legacy text entries without
+    a timestamp go to history-undated.jsonl.gz). Rolling out appends a new
+    gzip member, so existing archives are never rewritten. query() only
+    opens the months that overlap the requested range.
+    """
+
+    def __init__(self, directory="light_measure_archive"):
+        self.directory = directory
 
-    def save_data(self):
-        self.data_manager.save_data(
-            self.calculation_history,
-            self.price_per_kg.get(),
-            self.preferred_unit.get()
+    @staticmethod
+    def month_of(entry):
+        if isinstance(entry, str):
+            return "undated"
+        return time.strftime("%Y-%m", time.localtime(entry.timestamp))
+
+    def path_for(self, month):
+        return os.path.join(self.directory, f"history-{month}.jsonl.gz")
+
+    def months(self):
+        """Archived months, oldest first (undated last)"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(
+            name[len("history-"):-len(".jsonl.gz")]
+            for name in os.listdir(self.directory)
+            if name.startswith("history-") and name.endswith(".jsonl.gz")
         )
+        return sorted(names, key=lambda month: month == "undated")
+
+    def add(self, entries):
+        """Append entries to their month archives"""
+        import gzip
+
+        by_month = {}
+        for entry in entries:
+            by_month.setdefault(self.month_of(entry), []).append(entry)
+        if not by_month:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for month, month_entries in by_month.items():
+            with open(self.path_for(month), 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='ab') as f:
+                    f.write(b''.join(serialization.dumps(entry) + b'\n' for entry in month_entries))
+                # The member's trailer is written when the gzip stream closes
+                raw.flush()
+                os.fsync(raw.fileno())
+
+    def read_month(self, month):
+        """Entries archived for one month; a member torn by a crash keeps what decompressed"""
+        import zlib
+
+        with open(self.path_for(month), 'rb') as f:
+            data = f.read()
+        chunks = []
+        while data:
+            member = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                chunks.append(member.decompress(data))
+            except zlib.error:
+                break
+            if not member.eof:
+                break  # truncated last member; its torn line decodes as INVALID
+            data = member.unused_data
+        entries = serialization.loads_lines(b''.join(chunks), HistoryRecord)
+        return [entry for entry in entries if entry is not None and entry is not serialization.INVALID]
+
+    def query(self, mode=None, start=None, end=None, limit=100, offset=0):
+        """Archived entries filtered by mode and/or timestamp range, oldest first"""
+        first = None if start is None else time.strftime("%Y-%m", time.localtime(start))
+        last = None if end is None else time.strftime("%Y-%m", time.localtime(end))
+        results = []
+        for month in self.months():
+            if month == "undated":
+                if mode is not None or start is not None or end is not None:
+                    continue
+            elif (first is not None and month < first) or (last is not None and month > last):
+                continue
+            for entry in self.read_month(month):
+                if not isinstance(entry, str):
+                    if mode is not None and entry.mode != mode:
+                        continue
+                    if start is not None and entry.timestamp < start:
+                        continue
+                    if end is not None and entry.timestamp >= end:
+                        continue
+                if offset:
+                    offset -= 1
+                    continue
+                results.append(entry)
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+def count_older(history, cutoff):
+    """Number of leading entries older than `cutoff` (entries are in time order)"""
+    low, high = 0, len(history)
+    while low < high:
+        middle = (low + high) // 2
+        entry = history[middle]
+        if isinstance(entry, str) or entry.timestamp < cutoff:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class DataManager:
+    HISTORY_BACKENDS = {
+        "jsonl": HistoryLog,
+        "sqlite": SqliteHistoryStore,
+        "mmap": BinaryHistoryStore
+    }
+
+    def __init__(self, data_file="light_measure_data.json", history_file="light_measure_history.jsonl",
+                 history_db="light_measure_history.db", history_backend=None, save_delay=None,
+                 history_bin="light_measure_history.bin", archive_dir="light_measure_archive"):
+        self.data_file = data_file
+        self.history_file = history_file
+        self.history_db = history_db
+        self.history_bin = history_bin
+        self.archive = HistoryArchive(archive_dir)
+        self.history_backend = history_backend
+        self.default_data = {
+            "default_price": "",
+            "preferred_unit": "g",  # Default unit
+            "base_unit": "kg",  # Default base unit
+            "history_backend": "jsonl",  # "jsonl", "sqlite" or "mmap"
+            "history_imported": [],  # Backends the JSON Lines log has been imported into
+            "history_blur": False,  # Blur the window behind the history popup
+            # Retention: older entries are rolled into monthly archives (None = keep all)
+            "history_max_entries": None,
+            "history_max_days": None
+        }
+        self._saved_settings = None
+        # With a save_delay (seconds), writes go through a background writer
+        self.writer = BackgroundWriter(save_delay) if save_delay is not None else None
+        self.history = None
+
+    def save_settings(self, default_price, preferred_unit, base_unit):
+        """Persist settings atomically; unchanged settings are not rewritten"""
+        settings = {
+            **(self._saved_settings or self.default_data),
+            "default_price": default_price,
+            "preferred_unit": preferred_unit,
+            "base_unit": base_unit,
+            "history_backend": self.history_backend or self.default_data["history_backend"]
+        }
+        if settings == self._saved_settings:
+            return
+        self._saved_settings = settings
+        if self.writer is not None:
+            self.writer.submit("settings", lambda: atomic_write_json(self.data_file, settings))
+        else:
+            atomic_write_json(self.data_file, settings)
+
+    def load_settings(self):
+        try:
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'rb') as f:
+                    return {**self.default_data, **serialization.loads(f.read())}
+            return dict(self.default_data)
+        except (OSError, ValueError):
+            return dict(self.default_data)
+
+    def open_history(self, read_only=False, imported=()):
+        """Open the configured history store (`imported`: backends already holding the JSON Lines log)"""
+        if self.history_backend not in self.HISTORY_BACKENDS:
+            raise ValueError(f"Unknown history backend: {self.history_backend}")
+        if read_only:
+            store_path = self.history_db if self.history_backend == "sqlite" else self.history_bin
+            if (self.history_backend == "jsonl" or not os.path.exists(store_path)
+                    or (self.history_backend not in imported and os.path.exists(self.history_file))):
+                # The log has not been imported into the store yet
+                return HistoryLog(self.history_file, read_only=True)
+            if self.history_backend == "sqlite":
+                return SqliteHistoryStore(self.history_db, read_only=True)
+            return BinaryHistoryStore(self.history_bin, read_only=True)
+        if self.history_backend == "jsonl":
+            return HistoryLog(self.history_file, writer=self.writer)
+        if self.history_backend == "sqlite":
+            history = SqliteHistoryStore(self.history_db)
+        else:
+            history = BinaryHistoryStore(self.history_bin, writer=self.writer)
+        return history
+
+    def import_history_log(self, history):
+        """Copy the JSON Lines log into another store; the log stays for the jsonl backend"""
+        log = HistoryLog(self.history_file, read_only=True)
+        history.extend(log)
+        log.close()
+        if hasattr(history, "flush_pending"):
+            history.flush_pending()
+
+    def load_data(self, read_only=False):
+        """Load settings plus the history store, migrating history out of the settings file.
+
+        With read_only (queries from the CLI while the app may be running),
+        nothing is written: no migration, import, compaction or retention.
+        """
+        data = self.load_settings()
+        if self.history_backend is None:
+            self.history_backend = data["history_backend"]
+        imported = data["history_imported"]
+        if read_only:
+            data.pop("history", None)
+            data["history"] = self.history = self.open_history(read_only=True, imported=imported)
+            return data
+        legacy_history = data.pop("history", None)
+        history = self.open_history()
+        if (self.history_backend != "jsonl" and self.history_backend not in imported
+                and os.path.exists(self.history_file)):
+            # Imported once per backend, so entries cleared or archived
+            # later are not imported again
+            self.import_history_log(history)
+            imported = [*imported, self.history_backend]
+        if legacy_history and not len(history):
+            history.extend(
+                HistoryRecord.from_dict(entry) if isinstance(entry, dict) else entry for entry in legacy_history
+            )
+            # On disk before the settings file is rewritten without them
+            if hasattr(history, "flush_pending"):
+                history.flush_pending()
+        settings = {**data, "history_backend": self.history_backend, "history_imported": imported}
+        if legacy_history is not None or settings != data:
+            atomic_write_json(self.data_file, settings)
+        self._saved_settings = settings
+        data["history"] = self.history = history
+        self.apply_retention(history, data)
+        return data
+
+    def apply_retention(self, history=None, settings=None):
+        """Roll entries beyond the retention limits into the archive; returns how many moved"""
+        history = self.history if history is None else history
+        settings = self._saved_settings if settings is None else settings
+        max_entries = settings.get("history_max_entries")
+        max_days = settings.get("history_max_days")
+        count = 0
+        if max_entries is not None:
+            count = max(len(history) - int(max_entries), 0)
+        if max_days is not None:
+            count = max(count, count_older(history, time.time() - float(max_days) * 86400))
+        if count:
+            # Archive before dropping: a crash in between duplicates rather than loses entries
+            self.archive.add(history[:count])
+            history.drop_oldest(count)
+        return count
+
+    def query_history(self, mode=None, start=None, end=None, limit=100):
+        """Entries from the archives and the hot store, oldest first"""
+        results = self.archive.query(mode, start, end, limit)
+        remaining = limit - len(results)
+        if remaining <= 0:
+            return results
+        if hasattr(self.history, "query"):
+            return results + self.history.query(mode, start, end, remaining)
+        for entry in self.history:
+            if isinstance(entry, str):
+                if mode is None and start is None and end is None:
+                    results.append(entry)
+            elif ((mode is None or entry.mode == mode) and (start is None or entry.timestamp >= start)
+                  and (end is None or entry.timestamp < end)):
+                results.append(entry)
+            if len(results) >= limit:
+                break
+        return results
+
+    def history_columns(self, start=None, end=None):
+        """Archived and hot history as NumPy columns, limited to a timestamp range"""
+        import numpy as np
+
+        archived = history_columns(self.archive.query(start=start, end=end, limit=math.inf))
+        if hasattr(self.history, "columns"):
+            hot = self.history.columns()
+        else:
+            hot = history_columns(self.history)
+        columns = {field: np.concatenate((archived[field], hot[field])) for field in HISTORY_FIELDS}
+        mask = history_mask(columns, start=start, end=end)
+        return {field: values[mask] for field, values in columns.items()}
+
+    def flush(self):
+        """Write out anything the background writer still holds"""
+        if self.writer is not None:
+            self.writer.flush()
 
-    def clear_history(self):
-        self.calculation_history.clear()
-        self.history_text.delete(1.0, 'end')
-        self.save_data()
+    def close(self):
+        """Flush pending writes, apply retention and close the history store"""
+        if self.writer is not None:
+            self.writer.close()
+        if self.history is not None:
+            if self._saved_settings is not None:
+                self.apply_retention()
+            self.history.close()
@@ -1,51 +1,61 @@
-import ttkbootstrap as ttk # type: ignore
-from ttkbootstrap.constants import * # type: ignore
-import json
-import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+if __name__ == "__main__" and sys.argv[1:2] and not sys.argv[1].startswith('-'):
+    # Command-line use (`python -m light_measure price ...`) never loads the GUI toolkit
+    from cli import main as cli_main
+    sys.exit(cli_main())
+_IMPORT_START = time.perf_counter()
+if __name__ != "__mp_main__":
+    # Bulk pool workers re-import this module as __mp_main__ and need no GUI toolkit
+    import ttkbootstrap as ttk # type: ignore
+    from ttkbootstrap.constants import * # type: ignore
+_IMPORT_TTK_DONE = time.perf_counter()
 from typing import List, Dict
-import csv
-from tkinter import filedialog
-import tkinter as tk
-from PIL import Image, ImageTk, ImageFilter  # Add this import at the top
-import pyscreenshot as ImageGrab
+from pricing_engine import PricingEngine, validate_number
+from units import DEFAULT_REGISTRY, UNIT_INFO
+from catalog import ProductCatalog
+from bulk import BulkResults, export_bulk, iter_bulk_batches
+from data_manager import DataManager, HISTORY_FIELDS, format_history_entry, make_history_record
+from virtual_text import VirtualTextView
+from metrics import METRICS
+_IMPORT_DONE = time.perf_counter()
+# PIL, csv and filedialog are imported on first use (history overlay, exports)
 
-class DataManager:
+class StartupProfiler:
+    """Wall-clock timings of the startup stages, reported by --profile-startup"""
     def __init__(self):
-        self.data_file = "light_measure_data.json"
-        self.default_data = {
-            "history": [],
-            "default_price": "",
-            "preferred_unit": "g",  # Default unit
-            "base_unit": "kg"  # Default base unit
-        }
-        
-    def save_data(self, history, default_price, preferred_unit, base_unit):
-        data = {
-            "history": history,
-            "default_price": default_price,
-            "preferred_unit": preferred_unit,
-            "base_unit": base_unit
-        }
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f)
-            
-    def load_data(self):
+        self.stages = [
+            ("import ttkbootstrap", _IMPORT_TTK_DONE - _IMPORT_START),
+            ("import app modules", _IMPORT_DONE - _IMPORT_TTK_DONE)
+        ]
+        
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            return self.default_data
-        except:
-            return self.default_data
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+            
+    def report(self, file=sys.stderr):
+        total = sum(duration for _, duration in self.stages)
+        for name, duration in self.stages:
+            print(f"{name:<24}{duration * 1000:9.1f} ms", file=file)
+        print(f"{'total':<24}{total * 1000:9.1f} ms", file=file)
 
 class LightMeasureApp:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
+        self.profiler = profiler or StartupProfiler()
         self.root = root
         self.root.title("Light Measure")
         self.root.geometry("500x900")
         
         # Set theme and colors
-        self.style = ttk.Style("darkly")
+        with self.profiler.stage("theme"):
+            self.style = ttk.Style("darkly")
         self.primary_color = "primary"
         
         # Price per kg variable
@@ -54,11 +64,14 @@ class LightMeasureApp:
         # Add history storage
         self.calculation_history = []
         
-        # Initialize data manager
-        self.data_manager = DataManager()
+        # Initialize data manager; settings and history writes are coalesced
+        # on a background thread so clicks never wait on the disk
+        self.data_manager = DataManager(save_delay=0.25)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Load saved data
-        saved_data = self.data_manager.load_data()
+        with self.profiler.stage("load data"):
+            saved_data = self.data_manager.load_data()
         
         # Variables
         self.price_per_kg = ttk.StringVar(value=saved_data["default_price"])
@@ -68,16 +81,31 @@ class LightMeasureApp:
         # Add base unit variable
         self.base_unit = ttk.StringVar(value=saved_data.get("base_unit", "kg"))
         
-        # Update unit factors with display names
-        self.unit_info: Dict[str, Dict] = {
-            "g": {"factor": 1, "display": "Gram (g)"},
-            "kg": {"factor": 1000, "display": "Kilogram (kg)"},
-            "lb": {"factor": 453.592, "display": "Pound (lb)"},
-            "oz": {"factor": 28.3495, "display": "Ounce (oz)"}
-        }
+        # Product catalog, loaded in the background so startup does not wait on it
+        self._catalog = None
+        self._catalog_loader = threading.Thread(target=self.load_catalog, daemon=True)
+        self._catalog_loader.start()
+        self.product_matches = {}
+        
+        # History overlay images, cached until the window is resized
+        self.history_blur = saved_data.get("history_blur", False)
+        self._overlay_size = None
+        self._overlay_image = None
+        self._blur_image = None
+        self._blur_thread = None
+        self._blur_results = queue.Queue()
+        
+        # Unit factors with display names (shared with the pricing engine)
+        self.unit_info: Dict[str, Dict] = UNIT_INFO
+        self.units = DEFAULT_REGISTRY
         
         # Add new variable for bulk results
-        self.bulk_results: List[dict] = []
+        self.bulk_results = BulkResults(unit_codes=self.units.codes)
+        
+        # Background bulk job state
+        self._bulk_thread = None
+        self._bulk_cancel = threading.Event()
+        self._bulk_queue = queue.Queue()
         
         # Create styles for overlay and popup
         style = ttk.Style()
@@ -140,20 +168,46 @@ class LightMeasureApp:
         self.base_unit_combo.pack(side='left')
         self.base_unit_combo.bind('<<ComboboxSelected>>', self.update_price_label)
         
+        # Product lookup (type SKU or name to search the catalog)
+        product_container = ttk.Frame(price_frame)
+        product_container.pack(fill='x', pady=(5, 0))
+        
+        ttk.Label(
+            product_container,
+            text="Product",
+            font=('Roboto', 12)
+        ).pack(side='left', padx=(0, 10))
+        
+        self.product_combo = ttk.Combobox(
+            product_container,
+            font=('Roboto', 12)
+        )
+        self.product_combo.pack(side='left', fill='x', expand=True)
+        self.product_combo.bind('<KeyRelease>', self.search_products)
+        self.product_combo.bind('<<ComboboxSelected>>', self.select_product)
+        
         # Create unit selection frame
-        self.create_unit_selection_frame(main_container)
+        with self.profiler.stage("unit selection"):
+            self.create_unit_selection_frame(main_container)
         
         # Create notebook
         self.notebook = ttk.Notebook(main_container)
         self.notebook.pack(fill='both', expand=False, pady=10)
         
         # Create tabs
-        self.create_weight_to_price_tab()
-        self.create_price_to_weight_tab()
-        self.create_bulk_calc_tab()
+        with self.profiler.stage("calculator tabs"):
+            self.create_weight_to_price_tab()
+            self.create_price_to_weight_tab()
+            self.create_bulk_calc_tab()
         
         # Create history frame
-        self.create_history_frame(main_container)
+        with self.profiler.stage("history popup"):
+            self.create_history_frame(main_container)
+        
+        # Hidden diagnostics tab, toggled with Ctrl+Shift+D
+        self.diagnostics_frame = None
+        self._diagnostics_job = None
+        self.root.bind('<Control-D>', self.toggle_diagnostics)
         
         # Set a minimum window size
         self.root.minsize(500, 600)  # Adjust these values as needed
@@ -187,15 +241,11 @@ class LightMeasureApp:
 
     def clear_history(self):
         self.calculation_history.clear()
-        self.history_text.delete(1.0, 'end')
+        self.update_history_content()
         self.save_data()
 
     def validate_number(self, value):
-        try:
-            num = float(value)
-            return num >= 0
-        except ValueError:
-            return False
+        return validate_number(value)
 
     def create_calculator_frame(self, parent):
         frame = ttk.Frame(parent, padding=15)
@@ -402,10 +452,10 @@ class LightMeasureApp:
         return frame
 
     def convert_to_grams(self, value, from_unit):
-        return value * self.unit_info[from_unit]["factor"]
+        return self.units.convert(value, from_unit, "g")
         
     def convert_from_grams(self, grams, to_unit):
-        return grams / self.unit_info[to_unit]["factor"]
+        return self.units.convert(grams, "g", to_unit)
 
     def get_price_label(self) -> str:
         """Generate the price label based on selected base unit"""
@@ -420,14 +470,47 @@ class LightMeasureApp:
     def get_base_unit_code(self) -> str:
         """Get the unit code from the display name"""
         selected_display = self.base_unit_combo.get()
-        for code, info in self.unit_info.items():
-            if info["display"] == selected_display:
-                return code
-        return "kg"  # default fallback
+        return self.units.code_for_display(selected_display, "kg")  # default fallback
+
+    def load_catalog(self):
+        try:
+            self._catalog = ProductCatalog.load()
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error loading product catalog: {e}")
+            self._catalog = ProductCatalog()
+
+    @property
+    def catalog(self) -> ProductCatalog:
+        self._catalog_loader.join()
+        return self._catalog
+
+    def search_products(self, event=None):
+        """Type-ahead: offer catalog products matching the typed prefix"""
+        if event is not None and event.keysym in ('Up', 'Down', 'Return', 'Escape'):
+            return
+        matches = self.catalog.search(self.product_combo.get())
+        self.product_matches = {product.display: product for product in matches}
+        self.product_combo.configure(values=list(self.product_matches))
+
+    def select_product(self, event=None):
+        """Use the chosen product's price and base unit"""
+        product = self.product_matches.get(self.product_combo.get())
+        if product is None:
+            return
+        self.price_per_kg.set(str(product.price))
+        self.base_unit.set(self.unit_info[product.base_unit]["display"])
+        self.save_data()
+
+    def engine_for(self, product=None) -> PricingEngine:
+        """Engine for an explicit product, else for the entered price and base unit"""
+        if product is not None:
+            return PricingEngine.for_product(product, self.units)
+        return self.get_engine()
 
-    def calculate_price(self):
+    @METRICS.timed()
+    def calculate_price(self, product=None):
         try:
-            if not self.price_per_kg.get():
+            if product is None and not self.price_per_kg.get():
                 ttk.Messagebox.show_error(
                     title="Error",
                     message="Please enter base price first"
@@ -443,14 +526,8 @@ class LightMeasureApp:
                 return
                 
             weight = float(weight)
-            # Convert input weight to base unit
-            base_unit_code = self.get_base_unit_code()
-            weight_in_base = self.convert_between_units(
-                weight,
-                from_unit=self.preferred_unit.get(),
-                to_unit=base_unit_code
-            )
-            price = weight_in_base * float(self.price_per_kg.get())
+            engine = self.engine_for(product)
+            price = engine.calculate_price(weight, self.preferred_unit.get())
             result_text = f"Total Price: ₹{price:.2f}"
             
             self.price_result.config(
@@ -459,9 +536,7 @@ class LightMeasureApp:
             )
             
             # Add to history with unit
-            history_entry = f"Weight: {weight}{self.preferred_unit.get()} → {result_text}\n"
-            self.calculation_history.append(history_entry)
-            self.update_history()
+            self.add_history_record("weight_to_price", weight, price, engine)
             self.save_data()
             
         except ValueError:
@@ -470,9 +545,10 @@ class LightMeasureApp:
                 message="Please enter valid numbers"
             )
 
-    def calculate_weight(self):
+    @METRICS.timed()
+    def calculate_weight(self, product=None):
         try:
-            if not self.price_per_kg.get():
+            if product is None and not self.price_per_kg.get():
                 ttk.Messagebox.show_error(
                     title="Error",
                     message="Please enter base price first"
@@ -488,15 +564,8 @@ class LightMeasureApp:
                 return
                 
             price = float(price)
-            base_unit_code = self.get_base_unit_code()
-            # Calculate weight in base unit
-            weight_in_base = price / float(self.price_per_kg.get())
-            # Convert to preferred unit
-            weight = self.convert_between_units(
-                weight_in_base,
-                from_unit=base_unit_code,
-                to_unit=self.preferred_unit.get()
-            )
+            engine = self.engine_for(product)
+            weight = engine.calculate_weight(price, self.preferred_unit.get())
             result_text = f"Weight: {weight:.2f} {self.preferred_unit.get()}"
             
             self.weight_result.config(
@@ -505,9 +574,7 @@ class LightMeasureApp:
             )
             
             # Add to history
-            history_entry = f"Price: ₹{price} → {result_text}\n"
-            self.calculation_history.append(history_entry)
-            self.update_history()
+            self.add_history_record("price_to_weight", price, weight, engine)
             self.save_data()
             
         except ValueError:
@@ -518,23 +585,98 @@ class LightMeasureApp:
 
     def convert_between_units(self, value: float, from_unit: str, to_unit: str) -> float:
         """Convert between any two units"""
-        # Convert to grams first
-        grams = value * self.unit_info[from_unit]["factor"]
-        # Then convert to target unit
-        return grams / self.unit_info[to_unit]["factor"]
+        return self.units.convert(value, from_unit, to_unit)
+
+    def get_engine(self) -> PricingEngine:
+        """Build a pricing engine from the current price and base unit"""
+        return PricingEngine(
+            self.price_per_kg.get() or 0,
+            self.get_base_unit_code(),
+            self.units
+        )
 
     def save_data(self):
-        self.data_manager.save_data(
-            self.calculation_history,
+        # History entries are appended to the log as they are recorded
+        self.data_manager.save_settings(
             self.price_per_kg.get(),
             self.preferred_unit.get(),
             self.base_unit.get()  # Add base unit to saved data
         )
 
+    def on_close(self):
+        """Stop background work and flush pending writes before exiting"""
+        self.cancel_bulk()
+        self.save_data()
+        self.data_manager.close()
+        self.root.destroy()
+
+    def add_history_record(self, mode, input_value, result, engine):
+        """Record a calculation with the engine's base unit and price"""
+        record = make_history_record(
+            mode,
+            input_value,
+            self.preferred_unit.get(),
+            engine.base_unit,
+            engine.price_per_base,
+            result
+        )
+        self.calculation_history.append(record)
+        self.update_history()
+
+    def fetch_history_rows(self, offset, limit):
+        """Formatted history lines for the virtual history view"""
+        return [
+            format_history_entry(entry).rstrip('\n')
+            for entry in self.calculation_history.page(offset, limit)
+        ]
+
+    @METRICS.timed()
     def update_history(self):
-        self.history_text.delete(1.0, 'end')
-        for entry in self.calculation_history:
-            self.history_text.insert('end', entry)
+        """Show a newly recorded entry without redrawing the whole history"""
+        if self.history_popup_visible:
+            self.history_view.rows_appended()
+            self.clear_button.configure(state='normal')
+
+    def export_history(self):
+        """Export the full history to CSV one page at a time"""
+        if not len(self.calculation_history):
+            ttk.Messagebox.show_warning(
+                title="Warning",
+                message="No history to export"
+            )
+            return
+            
+        try:
+            from tkinter import filedialog
+            
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".csv",
+                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            )
+            
+            if file_path:
+                import csv
+                
+                with open(file_path, 'w', newline='') as csvfile:
+                    writer = csv.writer(csvfile)
+                    writer.writerow(HISTORY_FIELDS + ("entry",))
+                    # Stores page through their entries while iterating
+                    for entry in self.calculation_history:
+                        if isinstance(entry, str):
+                            fields = ("",) * len(HISTORY_FIELDS)
+                        else:
+                            fields = entry.as_row()
+                        writer.writerow(fields + (format_history_entry(entry).strip(),))
+                    
+                ttk.Messagebox.show_info(
+                    title="Success",
+                    message="History exported successfully"
+                )
+        except Exception as e:
+            ttk.Messagebox.show_error(
+                title="Error",
+                message=f"Error exporting history: {str(e)}"
+            )
 
     def create_bulk_calc_widgets(self, parent):
         """Create widgets for bulk calculations tab"""
@@ -650,10 +792,16 @@ class LightMeasureApp:
         )
         self.bulk_result_text.pack(fill='both', expand=True, pady=10)
 
-    def calculate_bulk(self):
-        """Process bulk calculations"""
+    # Lines per batch handed back to the Tk loop by a bulk job
+    BULK_BATCH_SIZE = 20_000
+
+    @METRICS.timed()
+    def calculate_bulk(self, product=None):
+        """Start a bulk calculation on a worker thread"""
+        if self._bulk_thread is not None and self._bulk_thread.is_alive():
+            return
         try:
-            if not self.price_per_kg.get():
+            if product is None and not self.price_per_kg.get():
                 ttk.Messagebox.show_error(
                     title="Error",
                     message="Please enter price per kg first"
@@ -661,55 +809,121 @@ class LightMeasureApp:
                 return
             
             # Clear previous results
-            self.bulk_results.clear()
-            self.bulk_result_text.delete(1.0, 'end')
+            self.bulk_results = BulkResults(self.bulk_mode.get(), self.units.codes)
+            self.bulk_view.scroll_to_end()
             
-            # Get input values
+            # Get input values: plain numbers or "SKU or price, quantity, unit" rows
             input_text = self.bulk_input.get(1.0, 'end').strip()
-            values = [line.strip() for line in input_text.split('\n') if line.strip()]
+            lines = [line.strip() for line in input_text.split('\n') if line.strip()]
             
-            for value in values:
-                if not self.validate_number(value):
-                    ttk.Messagebox.show_error(
-                        title="Error",
-                        message=f"Invalid value found: {value}"
-                    )
-                    return
-                
-                value = float(value)
-                if self.bulk_mode.get() == "weight_to_price":
-                    weight_in_grams = self.convert_to_grams(value, self.preferred_unit.get())
-                    price = (weight_in_grams / 1000) * float(self.price_per_kg.get())
-                    result = {
-                        'input': f"{value}{self.preferred_unit.get()}",
-                        'result': f"₹{price:.2f}"
-                    }
-                    self.bulk_result_text.insert('end', f"{value}{self.preferred_unit.get()} → ₹{price:.2f}\n")
-                else:
-                    weight_in_grams = (value / float(self.price_per_kg.get())) * 1000
-                    weight = self.convert_from_grams(weight_in_grams, self.preferred_unit.get())
-                    result = {
-                        'input': f"₹{value}",
-                        'result': f"{weight:.2f}{self.preferred_unit.get()}"
-                    }
-                    self.bulk_result_text.insert('end', f"₹{value} → {weight:.2f}{self.preferred_unit.get()}\n")
-                
-                self.bulk_results.append(result)
-                
-            # Add to history
-            history_entry = f"Bulk calculation: {len(values)} items processed\n"
-            self.calculation_history.append(history_entry)
-            self.update_history()
-            self.save_data()
+            unit = self.preferred_unit.get()
+            mode = self.bulk_mode.get()
+            engine = self.engine_for(product)
+            catalog = self.catalog
             
         except ValueError as e:
             ttk.Messagebox.show_error(
                 title="Error",
                 message=f"Error processing values: {str(e)}"
             )
+            return
+        
+        # Rows are calculated in vectorized batches (sharded across processes
+        # for large inputs) off the Tk thread and handed back via the queue
+        self._bulk_cancel.clear()
+        self._bulk_queue = queue.Queue()
+        self._bulk_job = {"total": len(lines), "done": 0, "start": time.perf_counter(), "engine": engine}
+        self._bulk_thread = threading.Thread(
+            target=self.run_bulk_job,
+            args=(lines, engine, mode, unit, catalog, self._bulk_cancel, self._bulk_queue),
+            daemon=True
+        )
+        self.set_bulk_running(True)
+        self._bulk_thread.start()
+        self.root.after(50, self.poll_bulk_job)
+
+    def run_bulk_job(self, lines, engine, mode, unit, catalog, cancel, results):
+        """Worker thread: calculate batches until done or cancelled"""
+        batches = iter_bulk_batches(lines, engine, mode, unit, catalog, self.BULK_BATCH_SIZE)
+        try:
+            for rows in batches:
+                if cancel.is_set():
+                    break
+                results.put(("rows", rows))
+        except ValueError as e:
+            results.put(("error", str(e)))
+            return
+        except Exception as e:
+            # e.g. BrokenProcessPool when a pool worker is killed; always
+            # report, or the Tk thread would poll for this job forever
+            results.put(("error", f"Bulk calculation failed: {e!r}"))
+            return
+        finally:
+            batches.close()
+        results.put(("cancelled" if cancel.is_set() else "done", None))
+
+    def poll_bulk_job(self):
+        """Tk thread: show finished batches and progress, then reschedule"""
+        deadline = time.perf_counter() + 0.03
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self._bulk_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "rows":
+                if self._bulk_cancel.is_set():
+                    # Drop batches that finished after Cancel was pressed
+                    continue
+                self.bulk_results.extend(payload)
+                self.bulk_view.rows_appended(len(payload))
+                self._bulk_job["done"] += len(payload)
+                continue
+            self.finish_bulk_job(kind, payload)
+            return
+        self.update_bulk_progress()
+        self.root.after(50, self.poll_bulk_job)
+
+    def update_bulk_progress(self):
+        job = self._bulk_job
+        elapsed = max(time.perf_counter() - job["start"], 1e-6)
+        self.bulk_progress.configure(value=100 * job["done"] / max(job["total"], 1))
+        self.bulk_status.configure(
+            text=f"{job['done']:,} / {job['total']:,} rows · {job['done'] / elapsed:,.0f} rows/s"
+        )
+
+    def finish_bulk_job(self, kind, payload):
+        self.update_bulk_progress()
+        self.set_bulk_running(False)
+        job = self._bulk_job
+        METRICS.observe("bulk_job", (time.perf_counter() - job["start"]) * 1000)
+        METRICS.count("bulk_rows", job["done"])
+        METRICS.count(f"bulk_{kind}")
+        if kind == "error":
+            self.bulk_status.configure(text="Failed")
+            ttk.Messagebox.show_error(
+                title="Error",
+                message=f"Error processing values: {payload}"
+            )
+        elif kind == "cancelled":
+            self.bulk_status.configure(text=f"Cancelled after {job['done']:,} rows")
+        else:
+            # Add to history
+            self.add_history_record("bulk", len(self.bulk_results), None, job["engine"])
+            self.save_data()
+
+    def fetch_bulk_rows(self, offset, limit):
+        """Format the bulk result rows currently on screen"""
+        return [f"{row['input']} → {row['result']}" for row in self.bulk_results.rows(offset, offset + limit)]
+
+    def cancel_bulk(self):
+        self._bulk_cancel.set()
+
+    def set_bulk_running(self, running):
+        self.bulk_calc_button.configure(state='disabled' if running else 'normal')
+        self.bulk_cancel_button.configure(state='normal' if running else 'disabled')
 
     def export_bulk_results(self):
-        """Export bulk calculation results to CSV"""
+        """Export bulk calculation results to CSV, Parquet, Arrow or binary columns"""
         if not self.bulk_results:
             ttk.Messagebox.show_warning(
                 title="Warning",
@@ -718,16 +932,22 @@ class LightMeasureApp:
             return
             
         try:
+            from tkinter import filedialog
+            
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+                filetypes=[
+                    ("CSV files", "*.csv"),
+                    ("Parquet files", "*.parquet"),
+                    ("Arrow files", "*.arrow *.feather"),
+                    ("Binary columns", "*.lmb"),
+                    ("All files", "*.*")
+                ]
             )
             
             if file_path:
-                with open(file_path, 'w', newline='') as csvfile:
-                    writer = csv.DictWriter(csvfile, fieldnames=['input', 'result'])
-                    writer.writeheader()
-                    writer.writerows(self.bulk_results)
+                # Columnar formats are written straight from the numeric columns
+                export_bulk(file_path, self.bulk_results)
                     
                 ttk.Messagebox.show_info(
                     title="Success",
@@ -766,15 +986,32 @@ class LightMeasureApp:
         )
         unit_frame.pack(fill='x', pady=10)
         
-        # Create radio buttons for unit selection
-        for unit, info in self.unit_info.items():
+        # Create radio buttons for the quick units
+        for unit in self.units.quick_units():
             ttk.Radiobutton(
                 unit_frame,
-                text=info["display"],
+                text=self.unit_info[unit]["display"],
                 variable=self.preferred_unit,
                 value=unit,
                 bootstyle="primary-toolbutton"
             ).pack(side='left', expand=True, padx=5)
+        
+        # Every configured unit (regional, count, volume) from a dropdown
+        more_units = [code for code in self.units.codes if code not in self.units.quick_units()]
+        if more_units:
+            more_combo = ttk.Combobox(
+                unit_frame,
+                values=[self.unit_info[code]["display"] for code in more_units],
+                state="readonly",
+                font=('Roboto', 12),
+                width=12
+            )
+            more_combo.set("More...")
+            more_combo.pack(side='left', expand=True, padx=5)
+            more_combo.bind(
+                '<<ComboboxSelected>>',
+                lambda e: self.preferred_unit.set(self.units.code_for_display(more_combo.get()))
+            )
 
     def create_weight_to_price_tab(self):
         """Create Weight to Price tab"""
@@ -926,7 +1163,7 @@ class LightMeasureApp:
         input_scroll.config(command=self.bulk_input.yview)
         
         # Placeholder text
-        self.bulk_input.insert('1.0', f"Enter values (one per line) in {self.preferred_unit.get()}")
+        self.bulk_input.insert('1.0', self.bulk_placeholder())
         self.bulk_input.bind('<FocusIn>', lambda e: self.on_input_focus_in())
         self.bulk_input.bind('<FocusOut>', lambda e: self.on_input_focus_out())
         
@@ -934,13 +1171,24 @@ class LightMeasureApp:
         button_frame = ttk.Frame(content_frame)
         button_frame.pack(fill='x', pady=5)
         
-        ttk.Button(
+        self.bulk_calc_button = ttk.Button(
             button_frame,
             text="Calculate",
             command=self.calculate_bulk,
             bootstyle="primary",
             padding=(10, 5)
-        ).pack(side='left', expand=True, padx=2)
+        )
+        self.bulk_calc_button.pack(side='left', expand=True, padx=2)
+        
+        self.bulk_cancel_button = ttk.Button(
+            button_frame,
+            text="Cancel",
+            command=self.cancel_bulk,
+            bootstyle="warning-outline",
+            padding=(10, 5),
+            state='disabled'
+        )
+        self.bulk_cancel_button.pack(side='left', expand=True, padx=2)
         
         ttk.Button(
             button_frame,
@@ -958,6 +1206,24 @@ class LightMeasureApp:
             padding=(10, 5)
         ).pack(side='left', expand=True, padx=2)
         
+        # Progress of the running bulk job
+        progress_frame = ttk.Frame(content_frame)
+        progress_frame.pack(fill='x', pady=(0, 5))
+        
+        self.bulk_progress = ttk.Progressbar(
+            progress_frame,
+            maximum=100,
+            bootstyle="success-striped"
+        )
+        self.bulk_progress.pack(side='left', fill='x', expand=True, padx=(2, 10))
+        
+        self.bulk_status = ttk.Label(
+            progress_frame,
+            text="",
+            font=('Roboto', 10)
+        )
+        self.bulk_status.pack(side='left')
+        
         # Results section
         results_frame = ttk.LabelFrame(content_frame, text="Results", padding=(10, 5))
         results_frame.pack(fill='both', expand=True, pady=5)
@@ -969,15 +1235,125 @@ class LightMeasureApp:
         self.bulk_result_text = ttk.Text(
             results_frame,
             height=6,
-            font=('Roboto', 11),
-            yscrollcommand=result_scroll.set
+            font=('Roboto', 11)
         )
         self.bulk_result_text.pack(fill='both', expand=True)
-        result_scroll.config(command=self.bulk_result_text.yview)
+        
+        # Only the visible result rows are ever inserted into the widget
+        self.bulk_view = VirtualTextView(
+            self.bulk_result_text,
+            result_scroll,
+            lambda: len(self.bulk_results),
+            self.fetch_bulk_rows
+        )
+
+    def toggle_diagnostics(self, event=None):
+        """Show or hide the diagnostics tab"""
+        if self.diagnostics_frame is None:
+            self.create_diagnostics_tab()
+        elif self.notebook.tab(self.diagnostics_frame, 'state') == 'hidden':
+            self.notebook.add(self.diagnostics_frame)
+        else:
+            self.notebook.hide(self.diagnostics_frame)
+            return
+        self.notebook.select(self.diagnostics_frame)
+        self.refresh_diagnostics()
+
+    def create_diagnostics_tab(self):
+        """Create the Diagnostics tab with live metrics and profiling controls"""
+        self.diagnostics_frame = ttk.Frame(self.notebook, padding=15)
+        self.notebook.add(self.diagnostics_frame, text="Diagnostics")
+        # The refresh loop stops while another tab is showing; restart it on return
+        self.notebook.bind('<<NotebookTabChanged>>', lambda event: self.refresh_diagnostics(), add='+')
+        
+        self.metrics_text = ttk.Text(
+            self.diagnostics_frame,
+            height=12,
+            font=('Courier', 10),
+            wrap='none'
+        )
+        self.metrics_text.pack(fill='both', expand=True)
+        
+        button_frame = ttk.Frame(self.diagnostics_frame)
+        button_frame.pack(fill='x', pady=(10, 0))
+        
+        self.profile_button = ttk.Button(
+            button_frame,
+            text="Start Profiling",
+            command=self.toggle_profiling,
+            bootstyle="warning-outline",
+            padding=(10, 5)
+        )
+        self.profile_button.pack(side='left', expand=True, padx=2)
+        
+        ttk.Button(
+            button_frame,
+            text="Dump",
+            command=self.dump_metrics,
+            bootstyle="success-outline",
+            padding=(10, 5)
+        ).pack(side='left', expand=True, padx=2)
+        
+        ttk.Button(
+            button_frame,
+            text="Reset",
+            command=lambda: (METRICS.reset(), self.refresh_diagnostics()),
+            bootstyle="danger-outline",
+            padding=(10, 5)
+        ).pack(side='left', expand=True, padx=2)
+
+    def refresh_diagnostics(self):
+        """Redraw the metrics once a second while the tab is showing"""
+        if self._diagnostics_job is not None:
+            self.root.after_cancel(self._diagnostics_job)
+            self._diagnostics_job = None
+        if self.notebook.select() != str(self.diagnostics_frame):
+            return
+        report = METRICS.report()
+        profile = METRICS.profile_stats()
+        if profile:
+            report += "\n\n" + profile
+        self.metrics_text.delete('1.0', 'end')
+        self.metrics_text.insert('1.0', report)
+        self._diagnostics_job = self.root.after(1000, self.refresh_diagnostics)
+
+    def toggle_profiling(self):
+        if METRICS.profiling:
+            METRICS.disable_profiling()
+            self.profile_button.configure(text="Start Profiling")
+        else:
+            METRICS.enable_profiling()
+            self.profile_button.configure(text="Stop Profiling")
+
+    def dump_metrics(self):
+        """Save the metrics snapshot and latest profile as JSON"""
+        try:
+            from tkinter import filedialog
+            
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                initialfile="light_measure_metrics.json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            
+            if file_path:
+                METRICS.dump(file_path)
+                ttk.Messagebox.show_info(
+                    title="Success",
+                    message="Metrics saved successfully"
+                )
+        except Exception as e:
+            ttk.Messagebox.show_error(
+                title="Error",
+                message=f"Error saving metrics: {str(e)}"
+            )
+
+    def bulk_placeholder(self):
+        return f"Enter values (one per line) in {self.preferred_unit.get()}\nor rows: SKU or price, quantity, unit"
 
     def on_input_focus_in(self):
         """Clear placeholder text when input gets focus"""
-        if self.bulk_input.get('1.0', 'end-1c') == f"Enter values (one per line) in {self.preferred_unit.get()}":
+        if self.bulk_input.get('1.0', 'end-1c') == self.bulk_placeholder():
             self.bulk_input.delete('1.0', 'end')
             self.bulk_input.configure(foreground='black')
 
@@ -985,13 +1361,16 @@ class LightMeasureApp:
         """Add placeholder text if input is empty"""
         if not self.bulk_input.get('1.0', 'end-1c').strip():
             self.bulk_input.configure(foreground='gray')
-            self.bulk_input.insert('1.0', f"Enter values (one per line) in {self.preferred_unit.get()}")
+            self.bulk_input.insert('1.0', self.bulk_placeholder())
 
     def clear_bulk_calc(self):
         """Clear both input and result areas in bulk calculation"""
+        self.cancel_bulk()
         self.bulk_input.delete('1.0', 'end')
-        self.bulk_result_text.delete('1.0', 'end')
-        self.bulk_results = []
+        self.bulk_results = BulkResults(self.bulk_mode.get(), self.units.codes)
+        self.bulk_view.scroll_to_end()
+        self.bulk_progress.configure(value=0)
+        self.bulk_status.configure(text="")
         # Reset placeholder text
         self.on_input_focus_out()
 
@@ -1015,7 +1394,7 @@ class LightMeasureApp:
             self.calculate_weight()  # Recalculate with new unit
         
         # Update Bulk calc results if they exist
-        if hasattr(self, 'bulk_result_text') and self.bulk_result_text.get(1.0, 'end').strip():
+        if self.bulk_results:
             self.calculate_bulk()  # Recalculate with new unit
 
     def create_history_frame(self, parent):
@@ -1040,24 +1419,103 @@ class LightMeasureApp:
         
         # Create popup content
         self.create_history_popup_content()
+        
+        # Cached overlay images are only valid for one window size
+        self.root.bind('<Configure>', self.on_root_configure, add='+')
+
+    def on_root_configure(self, event):
+        """Drop cached overlay images when the window is resized"""
+        if event.widget is self.root and (event.width, event.height) != self._overlay_size:
+            self._overlay_size = None
+            self._overlay_image = None
+            self._blur_image = None
+
+    def window_size(self):
+        self.root.update_idletasks()
+        return (self.root.winfo_width(), self.root.winfo_height())
 
     def create_blur_effect(self):
-        """Create a semi-transparent overlay instead of blur"""
+        """Semi-transparent overlay for the current window size, built once per size"""
+        size = self.window_size()
+        if self._overlay_image is not None and size == self._overlay_size:
+            return self._overlay_image
         try:
-            # Get window dimensions
-            width = self.root.winfo_width()
-            height = self.root.winfo_height()
+            from PIL import Image, ImageTk
             
             # Create a dark semi-transparent image
-            image = Image.new('RGBA', (width, height), (0, 0, 0, 128))
+            image = Image.new('RGBA', size, (0, 0, 0, 128))
             
             # Convert to PhotoImage
-            return ImageTk.PhotoImage(image)
+            self._overlay_image = ImageTk.PhotoImage(image)
+            self._overlay_size = size
+            self._blur_image = None
+            return self._overlay_image
         
         except Exception as e:
             print(f"Error creating overlay effect: {e}")
             return None
 
+    @staticmethod
+    def render_blur(screenshot, scale=8, radius=2):
+        """Darkened blur of a screenshot, computed on a downscaled copy"""
+        from PIL import Image, ImageFilter
+        
+        width, height = screenshot.size
+        small = screenshot.convert('RGB').resize(
+            (max(width // scale, 1), max(height // scale, 1)),
+            Image.BILINEAR
+        )
+        blurred = small.filter(ImageFilter.GaussianBlur(radius)).resize((width, height), Image.BILINEAR)
+        return Image.blend(blurred, Image.new('RGB', (width, height), (0, 0, 0)), 0.5)
+
+    def start_blur_render(self):
+        """Grab the window and blur it on a worker thread"""
+        if self._blur_thread is not None and self._blur_thread.is_alive():
+            return
+        size = self._overlay_size
+        try:
+            from PIL import ImageGrab
+            
+            x, y = self.root.winfo_rootx(), self.root.winfo_rooty()
+            screenshot = ImageGrab.grab(bbox=(x, y, x + size[0], y + size[1]))
+        except Exception as e:
+            print(f"Error capturing window for blur: {e}")
+            return
+        
+        def work():
+            try:
+                self._blur_results.put((size, self.render_blur(screenshot)))
+            except Exception as e:
+                print(f"Error blurring window: {e}")
+                self._blur_results.put((size, None))
+        
+        self._blur_thread = threading.Thread(target=work, daemon=True)
+        self._blur_thread.start()
+        self.root.after(30, self.poll_blur_result)
+
+    def poll_blur_result(self):
+        """Pick up the worker's blurred image on the Tk thread"""
+        try:
+            size, image = self._blur_results.get_nowait()
+        except queue.Empty:
+            self.root.after(30, self.poll_blur_result)
+            return
+        if image is None or size != self._overlay_size:
+            return
+        from PIL import ImageTk
+        
+        self._blur_image = ImageTk.PhotoImage(image)
+        if self.history_popup_visible:
+            self.show_overlay_image(self._blur_image)
+
+    def show_overlay_image(self, image):
+        self.blur_label.configure(image=image)
+        self.blur_label.image = image  # Keep a reference
+        self.blur_label.place(x=0, y=0, relwidth=1, relheight=1)
+        if image is self._blur_image:
+            # The blurred window replaces the flat overlay frame
+            self.blur_label.lift(self.overlay)
+
     def toggle_history_popup(self):
         """Toggle the history popup visibility"""
         if self.history_popup_visible:
@@ -1065,18 +1523,21 @@ class LightMeasureApp:
         else:
             self.show_history_popup()
 
+    @METRICS.timed()
     def show_history_popup(self):
         """Show the history popup with blur effect"""
         try:
-            # Take screenshot and create blur
-            self.root.update()
+            # Reuse the overlay for this window size when we have one
             blur_image = self.create_blur_effect()
+            if self.history_blur and blur_image and self._blur_image is None:
+                # Capture before the popup covers the window
+                self.start_blur_render()
             
-            if blur_image:
+            if self._blur_image is not None:
+                self.show_overlay_image(self._blur_image)
+            elif blur_image:
                 # Show blur background
-                self.blur_label.configure(image=blur_image)
-                self.blur_label.image = blur_image  # Keep a reference
-                self.blur_label.place(x=0, y=0, relwidth=1, relheight=1)
+                self.show_overlay_image(blur_image)
             
             # Show semi-transparent overlay
             self.overlay.place(relx=0, rely=0, relwidth=1, relheight=1)
@@ -1103,18 +1564,13 @@ class LightMeasureApp:
 
     def update_history_content(self):
         """Update the history text content"""
-        self.history_text.configure(state='normal')
-        self.history_text.delete(1.0, 'end')
+        # Only the rows that fit in the popup are rendered
+        self.history_view.scroll_to_end()
         
-        if self.calculation_history:
-            for entry in self.calculation_history:
-                self.history_text.insert('end', entry)
+        if len(self.calculation_history):
             self.clear_button.configure(state='normal')
         else:
-            self.history_text.insert('end', "No calculations yet.")
             self.clear_button.configure(state='disabled')
-        
-        self.history_text.configure(state='disabled')
 
     def show_normal_popup(self):
         """Fallback method for showing popup without blur"""
@@ -1172,11 +1628,19 @@ class LightMeasureApp:
             width=40,
             height=15,
             font=('Roboto', 11),
-            wrap='word',
-            yscrollcommand=scrollbar.set
+            wrap='none',
+            state='disabled'
         )
         self.history_text.pack(side='left', fill='both', expand=True)
-        scrollbar.config(command=self.history_text.yview)
+        
+        # Virtual view drives the scrollbar and renders the visible rows only
+        self.history_view = VirtualTextView(
+            self.history_text,
+            scrollbar,
+            lambda: len(self.calculation_history),
+            self.fetch_history_rows,
+            empty_text="No calculations yet."
+        )
         
         # Buttons with enhanced styling
         button_frame = ttk.Frame(content_frame)
@@ -1191,6 +1655,14 @@ class LightMeasureApp:
         )
         self.clear_button.pack(side='left', expand=True, padx=5)
         
+        ttk.Button(
+            button_frame,
+            text="Export",
+            command=self.export_history,
+            bootstyle="success-outline",
+            padding=10
+        ).pack(side='left', expand=True, padx=5)
+        
         ttk.Button(
             button_frame,
             text="Close",
@@ -1200,8 +1672,14 @@ class LightMeasureApp:
         ).pack(side='left', expand=True, padx=5)
 
 def main():
-    root = ttk.Window()
-    app = LightMeasureApp(root)
+    profiler = StartupProfiler()
+    with profiler.stage("create window"):
+        root = ttk.Window()
+    app = LightMeasureApp(root, profiler)
+    if "--profile-startup" in sys.argv[1:]:
+        with profiler.stage("first draw"):
+            root.update()
+        profiler.report()
     root.mainloop()
 if __name__ == "__main__":
     main()
@@ -0,0 +1,171 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Latency histogram with fixed log-spaced buckets"""
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, ms: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples (capped at the max)"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(LATENCY_BUCKETS_MS[index], self.max) if index < len(LATENCY_BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip([*map(str, LATENCY_BUCKETS_MS), "inf"], self.buckets))
+        }
+
+
+class Metrics:
+    """Counters and latency histograms for the hot paths, plus a cProfile switch.
+
+    Timing costs two perf_counter() calls and a lock, so it stays on in the
+    field. Profiling is off until enable_profiling() is called.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.started = time.time()
+        self._profiler = None
+        self._last_profile = ""
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, ms: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(ms)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name: str = None):
+        """Decorator recording each call's latency under `name`"""
+        def decorator(func):
+            label = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(label, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.time()
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler is not None
+
+    def enable_profiling(self):
+        """Start capturing a cProfile of the Tk thread"""
+        if self._profiler is None:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def disable_profiling(self) -> str:
+        """Stop profiling and return the top functions by cumulative time"""
+        if self._profiler is None:
+            return ""
+        self._profiler.disable()
+        stats = self.profile_stats()
+        self._profiler = None
+        self._last_profile = stats
+        return stats
+
+    def profile_stats(self, limit: int = 30) -> str:
+        if self._profiler is None:
+            return self._last_profile
+        import io
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "since": self.started,
+                "uptime_s": time.time() - self.started,
+                "counters": dict(self.counters),
+                "latency": {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+            }
+
+    def report(self) -> str:
+        """Human-readable summary for the diagnostics tab"""
+        data = self.snapshot()
+        header = f"{'operation':<22}{'calls':>7}{'mean':>9}{'p95':>9}{'max':>9}  (ms)"
+        lines = [f"Uptime {data['uptime_s']:.0f} s", "", header]
+        for name, stats in sorted(data["latency"].items()):
+            lines.append(
+                f"{name:<22}{stats['count']:>7}{stats['mean_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['max_ms']:>9.2f}"
+            )
+        if data["counters"]:
+            lines += ["", "counters"]
+            lines += [f"{name:<22}{value:>10}" for name, value in sorted(data["counters"].items())]
+        return '\n'.join(lines)
+
+    def dump(self, path: str):
+        """Write a snapshot (and the latest profile, if any) as JSON"""
+        from data_manager import atomic_write_json
+
+        atomic_write_json(path, {**self.snapshot(), "profile": self.profile_stats()})
+
+
+METRICS = Metrics()
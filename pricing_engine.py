@@ -0,0 +1,89 @@
+import math
+
+from units import DEFAULT_REGISTRY, UnitRegistry, Units
+
+
+def validate_number(value) -> bool:
+    """Return True if value parses as a non-negative number"""
+    try:
+        num = float(value)
+        return num >= 0
+    except (TypeError, ValueError):
+        return False
+
+
+class PricingEngine:
+    """GUI-free price/weight calculations for a single base price.
+
+    The price is expressed per one `base_unit`. Per-unit price and weight
+    factors are folded together with the base price up front, so each
+    scalar or batch calculation is a single multiply. The `*_batch` methods
+    take arrays of values and run one NumPy-vectorized pass.
+    """
+
+    def __init__(self, price_per_base: float, base_unit: str = "kg", units: UnitRegistry = None):
+        self.units = units if units is not None else DEFAULT_REGISTRY
+        base_id = self.units.unit_id(base_unit)
+        self.price_per_base = float(price_per_base)
+        self.base_unit = base_unit
+        # Price of one unit, and weight (in that unit) bought by one rupee
+        self.price_factors = [row[base_id] * self.price_per_base for row in self.units.matrix]
+        self.weight_factors = [
+            factor / self.price_per_base if self.price_per_base else None
+            for factor in self.units.matrix[base_id]
+        ]
+        self._price_array = None
+        self._weight_array = None
+
+    @classmethod
+    def for_product(cls, product, units: UnitRegistry = None) -> "PricingEngine":
+        """Engine priced from a catalog product's price and base unit"""
+        return cls(product.price, product.base_unit, units)
+
+    def convert_between_units(self, value: float, from_unit: str, to_unit: str) -> float:
+        """Convert between any two units"""
+        return self.units.convert(value, from_unit, to_unit)
+
+    def _check_factor(self, factor: float, unit: str) -> float:
+        if math.isnan(factor):
+            raise ValueError(f"Cannot convert {unit} to {self.base_unit}")
+        return factor
+
+    def calculate_price(self, weight: float, unit: str) -> float:
+        """Price of `weight` given in `unit`"""
+        return weight * self._check_factor(self.price_factors[self.units.unit_id(unit)], unit)
+
+    def calculate_weight(self, price: float, unit: str) -> float:
+        """Weight (in `unit`) that `price` buys"""
+        if not self.price_per_base:
+            raise ValueError("Base price must be non-zero")
+        return price * self._check_factor(self.weight_factors[self.units.unit_id(unit)], unit)
+
+    def _gather(self, table, units: Units, count: int):
+        """Per-row factors from a factor array, rejecting units that cannot convert"""
+        import numpy as np
+
+        factors = table[self.units.unit_ids(units, count)]
+        if np.isnan(factors).any():
+            raise ValueError(f"Cannot convert some units to {self.base_unit}")
+        return factors
+
+    def calculate_price_batch(self, weights, units: Units):
+        """Vectorized calculate_price; `units` is one code or one code per weight"""
+        import numpy as np
+
+        if self._price_array is None:
+            self._price_array = np.array(self.price_factors, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        return weights * self._gather(self._price_array, units, len(weights))
+
+    def calculate_weight_batch(self, prices, units: Units):
+        """Vectorized calculate_weight; `units` is one code or one code per price"""
+        import numpy as np
+
+        if not self.price_per_base:
+            raise ValueError("Base price must be non-zero")
+        if self._weight_array is None:
+            self._weight_array = np.array(self.weight_factors, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        return prices * self._gather(self._weight_array, units, len(prices))
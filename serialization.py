@@ -0,0 +1,109 @@
+"""JSON encoding through the fastest installed backend.
+
+orjson is preferred, then msgspec, then the standard library. Everything
+works in UTF-8 bytes so callers can write the result straight to a file
+opened in binary mode. History files are decoded in one call where
+possible; with msgspec, records are also validated against their
+dataclass while decoding.
+"""
+import dataclasses
+import gc
+import json
+from typing import List, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+BACKEND = "orjson" if orjson is not None else "msgspec" if msgspec is not None else "json"
+
+# Marks a line that could not be decoded (e.g. a write torn by a crash)
+INVALID = object()
+
+
+def _default(obj):
+    """Encode dataclass records (orjson and msgspec handle them natively) as objects"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+    loads = orjson.loads
+elif msgspec is not None:
+    dumps = msgspec.json.encode
+    loads = msgspec.json.decode
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, default=_default).encode('utf-8')
+
+    loads = json.loads
+
+
+_typed_decoders = {}
+
+
+def _typed_decoder(record_type):
+    """msgspec decoder for record lines: records, legacy strings or clear markers"""
+    decoder = _typed_decoders.get(record_type)
+    if decoder is None:
+        decoder = _typed_decoders[record_type] = msgspec.json.Decoder(Union[record_type, str, None])
+    return decoder
+
+
+def loads_lines(data: bytes, record_type=None) -> List:
+    """Decode one JSON value per non-empty line; undecodable lines become INVALID.
+
+    The whole buffer is decoded in one call (msgspec's line decoder, or
+    the lines joined into one JSON array), which avoids a Python-level
+    call per line; only a file with a bad line is decoded line by line.
+    With a record_type (a dataclass with a from_dict() constructor), JSON
+    objects come back as records; msgspec builds them while decoding.
+    """
+    # Nothing decoded here can form a cycle, so skip the collector passes
+    # that would otherwise rescan the growing heap many times
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if msgspec is not None and record_type is not None:
+            try:
+                return _typed_decoder(record_type).decode_lines(data)
+            except msgspec.DecodeError:
+                pass  # a torn line, or a record that does not fit the schema
+        values = _loads_lines(data)
+        if record_type is not None:
+            convert = record_type.from_dict
+            values = [convert(value) if type(value) is dict else value for value in values]
+        return values
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _loads_lines(data: bytes) -> List:
+    data = data.strip()
+    if not data:
+        return []
+    try:
+        # A raw newline never occurs inside a line
+        return loads(b'[' + data.replace(b'\n', b',') + b']')
+    except ValueError:
+        pass
+    values = []
+    for line in data.split(b'\n'):
+        if not line.strip():
+            continue
+        try:
+            values.append(loads(line))
+        except ValueError:
+            values.append(INVALID)
+    return values
@@ -0,0 +1,223 @@
+"""Local HTTP/JSON pricing service for other terminals on the LAN.
+
+Runs the same PricingEngine as the GUI on one asyncio event loop:
+
+    POST /price          {"weight": 250, "unit": "g"}            -> {"price": 25.0}
+    POST /weight         {"price": 25, "unit": "g"}              -> {"weight": 250.0}
+    POST /price/batch    {"weights": [...], "unit": "g"}         -> {"prices": [...]}
+    POST /weight/batch   {"prices": [...], "units": ["g", ...]}  -> {"weights": [...]}
+    GET  /settings, GET /health
+
+Requests may pass "rate": "100/kg"; otherwise the default price and base
+unit saved by the app are used. Connections are kept alive (HTTP/1.1
+semantics), so clients can send many requests, pipelined or not, over
+one socket.
+"""
+import asyncio
+import os
+from functools import lru_cache
+
+import serialization
+from cli import parse_rate
+from data_manager import DataManager
+from pricing_engine import PricingEngine
+from units import DEFAULT_REGISTRY
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+@lru_cache(maxsize=256)
+def engine_for(price_per_base, base_unit):
+    """Engines are cached so their factor tables are built once per rate"""
+    return PricingEngine(price_per_base, base_unit)
+
+
+class PricingService:
+    def __init__(self, data_manager=None):
+        self.data_manager = data_manager or DataManager()
+        self._settings = None
+        self._settings_mtime = None
+        self.requests = 0
+        self.routes = {
+            ("POST", "/price"): self.price,
+            ("POST", "/weight"): self.weight,
+            ("POST", "/price/batch"): self.price_batch,
+            ("POST", "/weight/batch"): self.weight_batch,
+            ("GET", "/settings"): self.settings,
+            ("GET", "/health"): self.health
+        }
+
+    def load_settings(self):
+        """The app's saved settings, re-read only when the file changes"""
+        try:
+            mtime = os.stat(self.data_manager.data_file).st_mtime
+        except OSError:
+            mtime = None
+        if self._settings is None or mtime != self._settings_mtime:
+            self._settings = self.data_manager.load_settings()
+            self._settings_mtime = mtime
+        return self._settings
+
+    def engine(self, body):
+        if "rate" in body:
+            return engine_for(*parse_rate(str(body["rate"])))
+        settings = self.load_settings()
+        if not settings["default_price"]:
+            raise ValueError("No default price saved; pass a rate such as \"100/kg\"")
+        # The app saves the combobox display name, e.g. "Kilogram (kg)"
+        return engine_for(float(settings["default_price"]),
+                          DEFAULT_REGISTRY.code_for_display(settings["base_unit"], "kg"))
+
+    def unit(self, body):
+        unit = body.get("unit") or self.load_settings()["preferred_unit"]
+        if not isinstance(unit, str):
+            raise ValueError("unit must be a unit code such as \"g\"")
+        return unit
+
+    def units(self, body):
+        """Per-value unit codes, or the single unit"""
+        units = body.get("units")
+        if not units:
+            return self.unit(body)
+        if not isinstance(units, list) or not all(isinstance(unit, str) for unit in units):
+            raise ValueError("units must be a list of unit codes")
+        return units
+
+    @staticmethod
+    def number(body, field):
+        value = body.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not value >= 0:
+            raise ValueError(f"{field} must be a non-negative number")
+        return value
+
+    @staticmethod
+    def numbers(body, field):
+        import numpy as np
+
+        try:
+            values = np.asarray(body.get(field), dtype=np.float64)
+        except (TypeError, ValueError):
+            values = None
+        if values is None or values.ndim != 1 or not (values >= 0).all():
+            raise ValueError(f"{field} must be a list of non-negative numbers")
+        return values
+
+    def price(self, body):
+        return {"price": self.engine(body).calculate_price(self.number(body, "weight"), self.unit(body))}
+
+    def weight(self, body):
+        return {"weight": self.engine(body).calculate_weight(self.number(body, "price"), self.unit(body))}
+
+    def price_batch(self, body):
+        weights = self.numbers(body, "weights")
+        prices = self.engine(body).calculate_price_batch(weights, self.units(body))
+        return {"prices": prices.tolist()}
+
+    def weight_batch(self, body):
+        prices = self.numbers(body, "prices")
+        weights = self.engine(body).calculate_weight_batch(prices, self.units(body))
+        return {"weights": weights.tolist()}
+
+    def settings(self, body):
+        settings = self.load_settings()
+        return {
+            "default_price": settings["default_price"],
+            "preferred_unit": settings["preferred_unit"],
+            "base_unit": DEFAULT_REGISTRY.code_for_display(settings["base_unit"], "kg")
+        }
+
+    def health(self, body):
+        return {"status": "ok", "requests": self.requests}
+
+    def dispatch(self, method, path, payload):
+        """Route one request; returns (status, response object)"""
+        handler = self.routes.get((method, path.split('?', 1)[0]))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                return 405, {"error": f"{method} not allowed"}
+            return 404, {"error": f"No such endpoint: {path}"}
+        try:
+            body = serialization.loads(payload) if payload else {}
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            return 200, handler(body)
+        except (ValueError, TypeError, KeyError) as e:
+            # A malformed body must never drop the connection without a response
+            return 400, {"error": str(e)}
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests from one client until it closes or asks to"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                    headers = await self.read_headers(reader)
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_SIZE:
+                        raise HttpError(413, "Request body too large")
+                    payload = await reader.readexactly(length) if length else b""
+                except HttpError as e:
+                    self.respond(writer, e.status, {"error": str(e)}, False)
+                    break
+                except ValueError:
+                    self.respond(writer, 400, {"error": "Malformed request"}, False)
+                    break
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                self.requests += 1
+                status, response = self.dispatch(method, path, payload)
+                self.respond(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_headers(reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    def respond(writer, status, response, keep_alive):
+        body = serialization.dumps(response)
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        print(f"Pricing service listening on {addresses}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def run(host=DEFAULT_HOST, port=DEFAULT_PORT, data_manager=None):
+    try:
+        asyncio.run(PricingService(data_manager).serve(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,263 @@
+import gzip
+import os
+import struct
+import time
+
+import pytest
+
+from data_manager import (
+    BackgroundWriter,
+    BinaryHistoryStore,
+    DataManager,
+    HistoryArchive,
+    HistoryLog,
+    SqliteHistoryStore,
+    make_history_record
+)
+
+LEGACY = "Weight: 250.0g → Total Price: ₹25.00\n"
+
+
+def record(timestamp, mode="weight_to_price", value=None):
+    value = float(timestamp) if value is None else value
+    return make_history_record(mode, value, "g", "kg", 100.0, value / 10, timestamp)
+
+
+def open_store(kind, tmp_path, **options):
+    if kind == "jsonl":
+        return HistoryLog(str(tmp_path / "history.jsonl"), fsync=False, **options)
+    if kind == "sqlite":
+        return SqliteHistoryStore(str(tmp_path / "history.db"))
+    return BinaryHistoryStore(str(tmp_path / "history.bin"), fsync=False, **options)
+
+
+def make_manager(tmp_path, backend, **options):
+    return DataManager(
+        str(tmp_path / "data.json"), str(tmp_path / "history.jsonl"), str(tmp_path / "history.db"), backend,
+        history_bin=str(tmp_path / "history.bin"), archive_dir=str(tmp_path / "archive"), **options
+    )
+
+
+STORES = ["jsonl", "sqlite", "mmap"]
+
+
+@pytest.mark.parametrize("kind", STORES)
+def test_round_trip(kind, tmp_path):
+    entries = [record(1000), LEGACY, record(1001, "price_to_weight"), record(1002, "bulk")]
+    store = open_store(kind, tmp_path)
+    store.extend(entries[:2])
+    store.append(entries[2])
+    store.append(entries[3])
+    store.close()
+
+    store = open_store(kind, tmp_path)
+    assert list(store) == entries
+    assert store.page(1, 2) == entries[1:3]
+    assert store[-1] == entries[-1]
+    store.close()
+
+
+@pytest.mark.parametrize("kind", STORES)
+def test_drop_oldest(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    store.extend(record(1000 + i) for i in range(10))
+    store.drop_oldest(4)
+    assert [entry.timestamp for entry in store] == [1004 + i for i in range(6)]
+    store.append(record(1010))
+    store.close()
+
+    store = open_store(kind, tmp_path)
+    assert [entry.timestamp for entry in store] == [1004 + i for i in range(7)]
+    store.close()
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "mmap"])
+def test_query_range_with_legacy_text(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    store.extend([record(1000 + i) for i in range(4)] + [LEGACY] + [record(1004 + i) for i in range(6)])
+    assert [entry.timestamp for entry in store.query(start=1003, end=1007)] == [1003, 1004, 1005, 1006]
+    assert [entry.timestamp for entry in store.query(start=1003, end=1007, limit=2, offset=1)] == [1004, 1005]
+    assert store.query(mode="bulk") == []
+    store.close()
+
+
+def test_binary_query_scans_unsorted_index(tmp_path):
+    store = open_store("mmap", tmp_path)
+    store.extend(record(timestamp) for timestamp in (1000, 1005, 1001, 1002, 1003))
+    assert [entry.timestamp for entry in store.query(start=1001, end=1004)] == [1001, 1002, 1003]
+    store.close()
+
+
+def test_binary_query_old_index_with_zero_timestamps(tmp_path):
+    store = open_store("mmap", tmp_path)
+    store.extend([record(1000), record(1001), LEGACY, record(1002), record(1003)])
+    store.close()
+    # Older versions indexed legacy text at 0.0
+    index_path = tmp_path / "history.bin.idx"
+    index = bytearray(index_path.read_bytes())
+    offset, _ = struct.unpack_from('<Qd', index, 2 * 16)
+    struct.pack_into('<Qd', index, 2 * 16, offset, 0.0)
+    index_path.write_bytes(bytes(index))
+
+    store = open_store("mmap", tmp_path)
+    assert [entry.timestamp for entry in store.query(start=1001, end=1004)] == [1001, 1002, 1003]
+    store.close()
+
+
+def test_jsonl_torn_tail_is_repaired(tmp_path):
+    store = open_store("jsonl", tmp_path)
+    store.extend([record(1000), record(1001)])
+    store.close()
+    with open(tmp_path / "history.jsonl", 'ab') as f:
+        f.write(b'{"timestamp": 1002, "mo')
+
+    store = open_store("jsonl", tmp_path)
+    assert [entry.timestamp for entry in store] == [1000, 1001]
+    store.append(record(1003))
+    store.close()
+    assert (tmp_path / "history.jsonl").read_bytes().endswith(b'\n')
+    store = open_store("jsonl", tmp_path)
+    assert [entry.timestamp for entry in store] == [1000, 1001, 1003]
+    store.close()
+
+
+def test_binary_torn_tail_and_lost_index_are_repaired(tmp_path):
+    store = open_store("mmap", tmp_path)
+    store.extend([record(1000), LEGACY, record(1001)])
+    store.close()
+    with open(tmp_path / "history.bin", 'ab') as f:
+        f.write(struct.pack('<I', 80) + b'\0' * 10)
+    os.remove(tmp_path / "history.bin.idx")
+
+    store = open_store("mmap", tmp_path)
+    assert list(store) == [record(1000), LEGACY, record(1001)]
+    store.append(record(1002))
+    assert [entry.timestamp for entry in store.query(start=1001)] == [1001, 1002]
+    store.close()
+
+
+def test_jsonl_clear_and_compaction(tmp_path):
+    store = open_store("jsonl", tmp_path)
+    store.extend(record(1000 + i) for i in range(5))
+    store.clear()
+    store.append(record(2000))
+    assert [entry.timestamp for entry in store] == [2000]
+    store.compact()
+    store.close()
+    assert (tmp_path / "history.jsonl").read_bytes().count(b'\n') == 1
+
+    store = open_store("jsonl", tmp_path)
+    assert [entry.timestamp for entry in store] == [2000]
+    store.close()
+
+
+@pytest.mark.parametrize("kind", ["jsonl", "mmap"])
+def test_failed_background_write_is_retried(kind, tmp_path, monkeypatch):
+    writer = BackgroundWriter(0)
+    store = open_store(kind, tmp_path, writer=writer)
+    store.fsync = True
+    store.append(record(1000))
+    writer.flush()
+
+    real_fsync = os.fsync
+    calls = []
+
+    def failing_fsync(fd):
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError(28, "No space left on device")
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    store.extend([record(1001), record(1002)])
+    writer.flush()
+    store.append(record(1003))
+    writer.flush()
+    monkeypatch.setattr(os, "fsync", real_fsync)
+    writer.close()
+    store.close()
+
+    store = open_store(kind, tmp_path)
+    assert [entry.timestamp for entry in store] == [1000, 1001, 1002, 1003]
+    store.close()
+
+
+def test_archive_round_trip_and_truncated_member(tmp_path):
+    archive = HistoryArchive(str(tmp_path / "archive"))
+    start = time.mktime((2024, 3, 10, 12, 0, 0, 0, 0, -1))
+    archive.add([record(start + i) for i in range(50)] + [LEGACY])
+    archive.add([record(start + 50 + i) for i in range(50)])
+    assert archive.months() == ["2024-03", "undated"]
+    assert len(archive.read_month("2024-03")) == 100
+    assert [entry.timestamp for entry in archive.query(start=start + 10, end=start + 13)] == [
+        start + 10, start + 11, start + 12
+    ]
+
+    path = archive.path_for("2024-03")
+    data = open(path, 'rb').read()
+    with open(path, 'wb') as f:
+        f.write(data[:-20])  # power cut while the last member was written
+    with pytest.raises(EOFError):
+        gzip.open(path).read()
+    entries = archive.read_month("2024-03")
+    assert 50 <= len(entries) < 100
+    assert [entry.timestamp for entry in entries] == [start + i for i in range(len(entries))]
+
+
+@pytest.mark.parametrize("backend", STORES)
+def test_retention_rolls_into_archive(backend, tmp_path):
+    now = time.time()
+    manager = make_manager(tmp_path, backend)
+    history = manager.load_data()["history"]
+    history.extend(record(now - 40 * 86400 + i) for i in range(5))
+    history.extend(record(now - i) for i in (3, 2, 1))
+    manager._saved_settings["history_max_days"] = 30
+    manager.close()
+
+    manager = make_manager(tmp_path, backend)
+    assert len(manager.load_data()["history"]) == 3
+    assert len(manager.archive.query(limit=100)) == 5
+    assert len(manager.query_history(limit=100)) == 8
+    manager.close()
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "mmap"])
+def test_log_is_imported_once(backend, tmp_path):
+    manager = make_manager(tmp_path, "jsonl")
+    manager.load_data()["history"].extend(record(1000 + i) for i in range(3))
+    manager.close()
+
+    manager = make_manager(tmp_path, backend)
+    history = manager.load_data()["history"]
+    assert len(history) == 3
+    history.clear()
+    manager.close()
+
+    manager = make_manager(tmp_path, backend)
+    assert len(manager.load_data()["history"]) == 0
+    manager.close()
+
+    # Switching back still finds the log
+    manager = make_manager(tmp_path, "jsonl")
+    assert len(manager.load_data()["history"]) == 3
+    manager.close()
+
+
+@pytest.mark.parametrize("backend", STORES)
+def test_read_only_load_writes_nothing(backend, tmp_path):
+    now = time.time()
+    manager = make_manager(tmp_path, backend)
+    history = manager.load_data()["history"]
+    history.extend(record(now - 40 * 86400 + i) for i in range(5))
+    manager._saved_settings["history_max_days"] = 30
+    manager.save_settings("100", "g", "kg")
+    history.close()
+    manager.history = None
+    before = {path: path.read_bytes() for path in tmp_path.iterdir() if path.is_file()}
+
+    manager = make_manager(tmp_path, backend)
+    assert len(manager.load_data(read_only=True)["history"]) == 5
+    assert len(manager.query_history(limit=100)) == 5
+    manager.close()
+    assert {path: path.read_bytes() for path in tmp_path.iterdir() if path.is_file()} == before
+    assert not (tmp_path / "archive").exists()
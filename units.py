@@ -0,0 +1,185 @@
+import json
+import math
+import os
+from typing import Dict, List, Sequence, Union
+
+# Shipped unit definitions, plus optional site-specific additions/overrides
+UNITS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "units.json")
+USER_UNITS_FILE = "light_measure_units.json"
+
+# Each unit's factor is relative to the base of its dimension:
+# grams for mass, millilitres for volume, pieces for count
+DIMENSIONS = ("mass", "volume", "count")
+
+# Unit codes are stored in fixed 16-byte fields by the binary history store
+MAX_CODE_BYTES = 16
+
+# Used when units.json is missing
+BUILTIN_UNITS: Dict[str, Dict] = {
+    "g": {"factor": 1, "display": "Gram (g)", "dimension": "mass", "quick": True},
+    "kg": {"factor": 1000, "display": "Kilogram (kg)", "dimension": "mass", "quick": True},
+    "lb": {"factor": 453.592, "display": "Pound (lb)", "dimension": "mass", "quick": True},
+    "oz": {"factor": 28.3495, "display": "Ounce (oz)", "dimension": "mass", "quick": True}
+}
+
+Units = Union[str, Sequence[str]]
+
+
+def validate_units(unit_info: Dict[str, Dict]):
+    """Raise ValueError describing the first invalid unit definition"""
+    if not unit_info:
+        raise ValueError("No units defined")
+    displays = set()
+    for code, info in unit_info.items():
+        if not code or len(code.encode('utf-8')) > MAX_CODE_BYTES:
+            raise ValueError(f"Unit {code!r}: code must be 1 to {MAX_CODE_BYTES} bytes (UTF-8)")
+        if not isinstance(info, dict):
+            raise ValueError(f"Unit {code!r}: definition must be an object")
+        factor = info.get("factor")
+        if isinstance(factor, bool) or not isinstance(factor, (int, float)) or not factor > 0:
+            raise ValueError(f"Unit {code!r}: factor must be a positive number")
+        display = info.get("display")
+        if not isinstance(display, str) or not display:
+            raise ValueError(f"Unit {code!r}: display must be a non-empty string")
+        if display in displays:
+            raise ValueError(f"Unit {code!r}: duplicate display name {display!r}")
+        displays.add(display)
+        dimension = info.get("dimension", "mass")
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unit {code!r}: dimension must be one of {', '.join(DIMENSIONS)}")
+        density = info.get("density")
+        if density is not None:
+            if dimension != "volume":
+                raise ValueError(f"Unit {code!r}: only volume units can have a density")
+            if isinstance(density, bool) or not isinstance(density, (int, float)) or not density > 0:
+                raise ValueError(f"Unit {code!r}: density must be a positive number (g/ml)")
+
+
+def load_unit_info(paths: Sequence[str] = (UNITS_FILE, USER_UNITS_FILE)) -> Dict[str, Dict]:
+    """Merge unit definitions from the config files that exist, later files winning"""
+    unit_info = {}
+    found = False
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        found = True
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Invalid unit config {path}: {e}") from None
+        unit_info.update(config.get("units", {}))
+    return unit_info if found else dict(BUILTIN_UNITS)
+
+
+class UnitRegistry:
+    """Units indexed by integer id with a precomputed pairwise factor matrix.
+
+    `matrix[from_id][to_id]` is the factor that converts a value in one unit
+    to the other, so every conversion is a single multiply. Codes and display
+    names are mapped to ids once, up front. Units of different dimensions
+    do not convert (NaN in the matrix), except volume units with a density
+    (g/ml), which convert to and from mass.
+    """
+
+    def __init__(self, unit_info: Dict[str, Dict]):
+        validate_units(unit_info)
+        self.unit_info = unit_info
+        self.codes: List[str] = list(unit_info)
+        self.ids: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self.displays: List[str] = [unit_info[code]["display"] for code in self.codes]
+        self.code_by_display: Dict[str, str] = {
+            display: code for code, display in zip(self.codes, self.displays)
+        }
+        self.dimensions: List[str] = [unit_info[code].get("dimension", "mass") for code in self.codes]
+        self.matrix: List[List[float]] = [
+            [self._pair_factor(from_code, to_code) for to_code in self.codes]
+            for from_code in self.codes
+        ]
+        self._matrix_array = None
+
+    @staticmethod
+    def _grams(info: Dict) -> float:
+        """Grams in one unit; NaN for count units and volume units without a density"""
+        dimension = info.get("dimension", "mass")
+        if dimension == "mass":
+            return info["factor"]
+        if dimension == "volume":
+            return info["factor"] * info.get("density", math.nan)
+        return math.nan
+
+    def _pair_factor(self, from_code: str, to_code: str) -> float:
+        source, target = self.unit_info[from_code], self.unit_info[to_code]
+        if source.get("dimension", "mass") == target.get("dimension", "mass"):
+            return source["factor"] / target["factor"]
+        # Across dimensions only mass <-> volume with density converts
+        return self._grams(source) / self._grams(target)
+
+    def quick_units(self) -> List[str]:
+        """Codes of units flagged for the quick unit selector"""
+        return [code for code in self.codes if self.unit_info[code].get("quick")]
+
+    def __contains__(self, code) -> bool:
+        return code in self.ids
+
+    def unit_id(self, code: str) -> int:
+        try:
+            return self.ids[code]
+        except KeyError:
+            raise ValueError(f"Unknown unit: {code}") from None
+
+    def code_for_display(self, display: str, default: str = None) -> str:
+        """Unit code for a display name such as "Kilogram (kg)" (codes pass through)"""
+        if display in self.ids:
+            return display
+        return self.code_by_display.get(display, default)
+
+    def factor(self, from_unit: str, to_unit: str) -> float:
+        factor = self.matrix[self.unit_id(from_unit)][self.unit_id(to_unit)]
+        if math.isnan(factor):
+            raise ValueError(f"Cannot convert {from_unit} to {to_unit}")
+        return factor
+
+    def convert(self, value: float, from_unit: str, to_unit: str) -> float:
+        return value * self.factor(from_unit, to_unit)
+
+    @property
+    def matrix_array(self):
+        """The factor matrix as a NumPy array, built on first use"""
+        if self._matrix_array is None:
+            import numpy as np
+
+            self._matrix_array = np.array(self.matrix, dtype=np.float64)
+        return self._matrix_array
+
+    def unit_ids(self, units: Units, count: int = None):
+        """Unit id per row (NumPy array), or a single int for one unit code"""
+        import numpy as np
+
+        if isinstance(units, str):
+            return self.unit_id(units)
+        codes, inverse = np.unique(np.asarray(units, dtype=str), return_inverse=True)
+        if count is not None and len(inverse) != count:
+            raise ValueError("units must match the number of values")
+        table = np.array([self.unit_id(code) for code in codes], dtype=np.intp)
+        return table[inverse]
+
+    def convert_batch(self, values, from_units: Units, to_unit: str):
+        """Vectorized convert; `from_units` is one code or one code per value"""
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64)
+        from_ids = self.unit_ids(from_units, len(values))
+        factors = self.matrix_array[from_ids, self.unit_id(to_unit)]
+        if np.isnan(factors).any():
+            raise ValueError(f"Cannot convert to {to_unit} from a unit of another dimension")
+        return values * factors
+
+
+def load_unit_registry(paths: Sequence[str] = (UNITS_FILE, USER_UNITS_FILE)) -> UnitRegistry:
+    """Load, validate and compile the unit config once"""
+    return UnitRegistry(load_unit_info(paths))
+
+
+DEFAULT_REGISTRY = load_unit_registry()
+UNIT_INFO: Dict[str, Dict] = DEFAULT_REGISTRY.unit_info
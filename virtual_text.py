@@ -0,0 +1,124 @@
+from tkinter import font as tkfont
+from typing import Callable, List
+
+
+class VirtualTextView:
+    """Show a window onto a large list of rows in a Text widget.
+
+    Only the rows that fit in the widget are ever inserted. The scrollbar is
+    driven from the row position instead of the widget contents, so render
+    cost depends on the widget height, not on how many rows exist.
+    `fetch_rows(offset, limit)` returns the rows as strings without newlines.
+    """
+
+    def __init__(self, text, scrollbar, row_count: Callable[[], int],
+                 fetch_rows: Callable[[int, int], List[str]], empty_text: str = ""):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.row_count = row_count
+        self.fetch_rows = fetch_rows
+        self.empty_text = empty_text
+        self.first = 0
+        self._rendered = 0
+        self._follow_end = True
+        self._line_height = max(tkfont.Font(font=text.cget('font')).metrics('linespace'), 1)
+
+        self.text.configure(wrap='none', yscrollcommand='')
+        self.scrollbar.configure(command=self.yview)
+        self.text.bind('<MouseWheel>', self._on_mousewheel)
+        self.text.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.text.bind('<Button-5>', lambda e: self.scroll(3))
+        self.text.bind('<Configure>', lambda e: self.refresh())
+
+    def visible_rows(self) -> int:
+        """Number of rows that fit in the widget"""
+        height = self.text.winfo_height()
+        if height <= 1:
+            # Not mapped yet; fall back to the configured height in lines
+            return int(self.text.cget('height'))
+        return max(height // self._line_height, 1)
+
+    def _clamp(self, first: int, total: int, visible: int) -> int:
+        return min(max(first, 0), max(total - visible, 0))
+
+    def _set_text(self, content: str):
+        state = self.text.cget('state')
+        self.text.configure(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.insert('1.0', content)
+        self.text.configure(state=state)
+
+    def _update_scrollbar(self, total: int, visible: int):
+        if total <= visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + visible) / total)
+
+    def refresh(self):
+        """Re-render the current window"""
+        total = self.row_count()
+        visible = self.visible_rows()
+        if self._follow_end:
+            self.first = max(total - visible, 0)
+        self.first = self._clamp(self.first, total, visible)
+        if total:
+            rows = self.fetch_rows(self.first, visible)
+            self._set_text('\n'.join(rows))
+            self._rendered = len(rows)
+        else:
+            self._set_text(self.empty_text)
+            self._rendered = 0
+        self._update_scrollbar(total, visible)
+
+    def scroll_to_end(self):
+        self._follow_end = True
+        self.refresh()
+
+    def scroll_to(self, first: int):
+        total = self.row_count()
+        visible = self.visible_rows()
+        self.first = self._clamp(first, total, visible)
+        self._follow_end = self.first >= total - visible
+        self.refresh()
+
+    def scroll(self, rows: int):
+        self.scroll_to(self.first + rows)
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.row_count()))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows()
+            self.scroll(amount)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
+
+    def rows_appended(self, count: int = 1):
+        """Show newly appended rows, touching only the changed lines when following the end"""
+        total = self.row_count()
+        visible = self.visible_rows()
+        if not self._follow_end:
+            self._update_scrollbar(total, visible)
+            return
+        if not self._rendered or count >= visible:
+            self.refresh()
+            return
+        rows = self.fetch_rows(total - count, count)
+        state = self.text.cget('state')
+        self.text.configure(state='normal')
+        self.text.insert('end-1c', '\n' + '\n'.join(rows))
+        self._rendered += len(rows)
+        overflow = self._rendered - visible
+        if overflow > 0:
+            self.text.delete('1.0', f'{overflow + 1}.0')
+            self._rendered = visible
+        self.text.configure(state=state)
+        self.first = max(total - visible, 0)
+        self._update_scrollbar(total, visible)